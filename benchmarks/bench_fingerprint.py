@@ -0,0 +1,161 @@
+"""Throughput and latency benchmark of SQLFingerprinter.fingerprint.
+
+Fingerprints a generated corpus in several tiers and reports queries/sec,
+p50/p99 latency per call and peak traced memory for each. Results can be
+saved as JSON and compared with an earlier run:
+
+    python benchmarks/bench_fingerprint.py --output before.json
+    python benchmarks/bench_fingerprint.py --baseline before.json --threshold 0.1
+
+The comparison exits with status 1 if any tier's throughput dropped by more
+than the threshold (a fraction of the baseline).
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint.core import ENGINES
+
+TABLES = ['users', 'orders', 'products', 'customers', 'shipments', 'invoices']
+COLUMNS = ['id', 'name', 'email', 'status', 'created_at', 'total', 'region', 'owner_id']
+
+
+def point_lookups(rng, n):
+    for _ in range(n):
+        yield (f"SELECT {', '.join(rng.sample(COLUMNS, 3))} FROM {rng.choice(TABLES)} "
+               f"WHERE id = {rng.randrange(10 ** 6)}")
+
+
+def wide_in_lists(rng, n, width=5000):
+    for _ in range(n):
+        values = ', '.join(str(rng.randrange(10 ** 9)) for _ in range(width))
+        yield f"SELECT * FROM {rng.choice(TABLES)} WHERE id IN ({values})"
+
+
+def nested_queries(rng, n, depth=12):
+    for _ in range(n):
+        sql = f"SELECT id FROM {rng.choice(TABLES)} WHERE total > {rng.random() * 100:.2f}"
+        for level in range(depth):
+            sql = (f"SELECT id FROM {rng.choice(TABLES)} WHERE owner_id IN ({sql}) "
+                   f"AND status = 'state{level}'")
+        ctes = ', '.join(f"c{i} AS (SELECT id, name FROM {rng.choice(TABLES)} WHERE region = 'r{i}')"
+                         for i in range(4))
+        yield f"WITH {ctes} SELECT c0.name FROM c0 JOIN c1 ON c0.id = c1.id WHERE c0.id IN ({sql})"
+
+
+def orm_queries(rng, n, joins=12):
+    for _ in range(n):
+        columns = ', '.join(f"t{j}.{column} AS t{j}_{column}" for j in range(joins) for column in COLUMNS)
+        sql = f"SELECT {columns} FROM {TABLES[0]} t0"
+        for j in range(1, joins):
+            sql += f" LEFT OUTER JOIN {rng.choice(TABLES)} t{j} ON t{j}.owner_id = t{j - 1}.id"
+        conditions = ' AND '.join(f"t{j}.status = 'active' AND t{j}.created_at > '2024-01-0{j % 9 + 1}'"
+                                  for j in range(joins))
+        yield f"{sql} WHERE {conditions} ORDER BY t0.created_at DESC LIMIT 50 OFFSET {rng.randrange(1000)}"
+
+
+TIERS = {
+    'point': (point_lookups, 2000),
+    'in_list': (wide_in_lists, 20),
+    'nested': (nested_queries, 50),
+    'orm': (orm_queries, 50),
+}
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_tier(fingerprinter, queries):
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for sql in queries:
+        before = clock()
+        fingerprinter.fingerprint(sql)
+        latencies.append(clock() - before)
+    elapsed = clock() - start
+    latencies.sort()
+
+    # Memory is traced in a separate pass since tracing slows everything down.
+    tracemalloc.start()
+    for sql in queries[:10]:
+        fingerprinter.fingerprint(sql)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'queries': len(queries),
+        'qps': len(queries) / elapsed,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'peak_bytes': peak,
+    }
+
+
+def run(engine, tiers, scale, seed):
+    fingerprinter = SQLFingerprinter(engine=engine)
+    results = {}
+    for name in tiers:
+        generate, count = TIERS[name]
+        queries = list(generate(random.Random(seed), max(1, int(count * scale))))
+        fingerprinter.fingerprint(queries[0])
+        results[name] = run_tier(fingerprinter, queries)
+    return {
+        'engine': engine,
+        'python': platform.python_version(),
+        'scale': scale,
+        'tiers': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Return a message per tier whose throughput regressed beyond `threshold`."""
+    regressions = []
+    for name, result in report['tiers'].items():
+        before = baseline['tiers'].get(name)
+        if before is None:
+            continue
+        change = result['qps'] / before['qps'] - 1
+        if change < -threshold:
+            regressions.append(f"{name}: {before['qps']:.1f} -> {result['qps']:.1f} queries/sec "
+                               f"({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', choices=ENGINES, default='sqlparse')
+    parser.add_argument('--tiers', nargs='+', choices=sorted(TIERS), default=list(TIERS))
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply the number of queries per tier')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed drop in throughput as a fraction (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    report = run(args.engine, args.tiers, args.scale, args.seed)
+    for name, result in report['tiers'].items():
+        print(f"{name:8} {result['qps']:10.1f} q/s  p50 {result['p50_ms']:8.3f} ms  "
+              f"p99 {result['p99_ms']:8.3f} ms  peak {result['peak_bytes'] / 1024:9.1f} KiB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for message in regressions:
+            print(f"regression: {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
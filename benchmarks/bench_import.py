@@ -0,0 +1,113 @@
+"""Cold start benchmark: import time of sqlfingerprint in fresh processes.
+
+Runs ``python -X importtime`` on a few start-up stages and reports the median
+time spent importing modules the interpreter itself did not already load, and
+the heaviest of those modules. Results can be saved as JSON and compared with
+an earlier run:
+
+    python benchmarks/bench_import.py --output before.json
+    python benchmarks/bench_import.py --baseline before.json --threshold 0.25
+
+The comparison exits with status 1 if any stage got slower by more than the
+threshold (a fraction of the baseline).
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+
+STAGES = {
+    'import': "import sqlfingerprint",
+    'construct': "from sqlfingerprint import SQLFingerprinter; SQLFingerprinter()",
+    'first_fingerprint': "from sqlfingerprint import SQLFingerprinter; "
+                         "SQLFingerprinter().fingerprint('SELECT id FROM users WHERE id = 1')",
+}
+
+
+def import_times(code):
+    """Return {module: (self us, cumulative us, depth)} for one run of `code`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def run_stage(code, repeat, startup):
+    totals = []
+    modules = {}
+    for _ in range(repeat):
+        times = import_times(code)
+        new = {name: t for name, t in times.items() if name not in startup}
+        totals.append(sum(self_us for self_us, _, _ in new.values()))
+        for name, (self_us, _, _) in new.items():
+            modules.setdefault(name, []).append(self_us)
+    heaviest = sorted(((statistics.median(t), name) for name, t in modules.items()), reverse=True)
+    return {
+        'import_ms': statistics.median(totals) / 1000,
+        'modules': len(modules),
+        'heaviest': [[name, us / 1000] for us, name in heaviest[:5]],
+        'sqlparse_loaded': 'sqlparse' in modules,
+    }
+
+
+def run(stages, repeat):
+    startup = set(import_times('pass'))
+    return {
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'stages': {name: run_stage(STAGES[name], repeat, startup) for name in stages},
+    }
+
+
+def compare(report, baseline, threshold):
+    """Return a message per stage whose import time regressed beyond `threshold`."""
+    regressions = []
+    for name, result in report['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            continue
+        change = result['import_ms'] / before['import_ms'] - 1
+        if change > threshold:
+            regressions.append(f"{name}: {before['import_ms']:.1f} -> {result['import_ms']:.1f} ms "
+                               f"({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=15, help='fresh processes per stage')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed increase in import time as a fraction (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    report = run(args.stages, args.repeat)
+    for name, result in report['stages'].items():
+        heaviest = ', '.join(f"{module} {ms:.1f}" for module, ms in result['heaviest'][:3])
+        print(f"{name:17} {result['import_ms']:7.1f} ms  {result['modules']:4} modules  "
+              f"sqlparse {'yes' if result['sqlparse_loaded'] else 'no ':3}  heaviest: {heaviest}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for message in regressions:
+            print(f"regression: {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Micro-benchmark of FingerprintIndex lookups.
+
+Registers a large allowlist of fingerprints and compares ``match`` with
+fingerprinting every query and looking it up in a set, for queries that are
+registered and for unknown queries that differ from a registered one early
+or late in the text. Run with
+``python benchmarks/bench_index.py [--size N]``.
+"""
+import argparse
+import random
+import timeit
+
+from sqlfingerprint import FingerprintIndex, SQLFingerprinter
+
+TABLES = ('users', 'orders', 'accounts', 'products', 'invoices', 'sessions', 'events', 'payments')
+VERBS = ('select * from {table} where {column} = ?',
+         'select {column}, count(*) from {table} where {column} > ? group by {column}',
+         'update {table} set {column} = ? where id = ?',
+         'delete from {table} where {column} in (?)')
+
+
+def make_fingerprints(size):
+    fingerprints = set()
+    i = 0
+    while len(fingerprints) < size:
+        template = VERBS[i % len(VERBS)]
+        fingerprints.add(template.format(table=TABLES[i % len(TABLES)] + str(i // 64), column=f'col{i % 97}'))
+        i += 1
+    return sorted(fingerprints)
+
+
+def to_query(fingerprint, rng):
+    return fingerprint.replace('in (?)', 'in (1, 2, 3)').replace('?', str(rng.randrange(10 ** 6))).upper()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help="number of registered fingerprints")
+    parser.add_argument('--queries', type=int, default=20000, help="number of queries per run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fingerprints = make_fingerprints(args.size)
+    fingerprinter = SQLFingerprinter(engine='fast')
+    index = FingerprintIndex.from_fingerprints(fingerprints, fingerprinter)
+    allowlist = set(fingerprints)
+    hits = [to_query(rng.choice(fingerprints), rng) for _ in range(args.queries)]
+    early = [query.replace(' ', ' X', 1) for query in hits]
+    late = [query + ' LIMIT 10' for query in hits]
+    for query in hits:
+        assert index.match(query) is not None
+    for query in early + late:
+        assert index.match(query) is None
+
+    def lookup(queries):
+        for query in queries:
+            fingerprinter.fingerprint(query) in allowlist
+
+    def match(queries):
+        for query in queries:
+            index.match(query)
+
+    for label, queries in (('registered', hits), ('early miss', early), ('late miss', late)):
+        for name, func in (('fingerprint+set', lookup), ('index.match', match)):
+            seconds = min(timeit.repeat(lambda: func(queries), number=1, repeat=3))
+            print(f"{label:10} {name:16} {seconds / len(queries) * 1e6:8.2f} us/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Memory benchmark of fingerprinting large statements received as bytes.
+
+Compares ``SQLFingerprinter.fingerprint`` on a ``memoryview`` with the
+pipeline it replaced: decode a ``bytes`` copy of the payload, format the
+statement to text with ``sqlparse.format``, parse that text again, render it
+and post-process it with a whitespace pass of its own. Reports time per call,
+peak traced memory and the number of sqlparse token objects created, which
+make up most of the allocations. Run with ``python benchmarks/bench_memory.py``.
+"""
+import re
+import timeit
+import tracemalloc
+
+import sqlparse
+from sqlparse import sql as S
+
+from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint import core
+from sqlfingerprint.bulk import MARKER, collapse_bulk
+from sqlfingerprint.postprocess import POSTPROCESS_KEYWORDS
+
+_LEGACY_KEYWORD_RE = re.compile(r"""
+    (?=[aeilno])
+    (?:
+        (?P<in>in\s*\(\s*\?(?:\s*,\s*\?)+\s*\))
+      | \b(?:%s)\b
+    )
+""" % '|'.join(keyword.replace(' ', r'\ ') for keyword in POSTPROCESS_KEYWORDS),
+    re.IGNORECASE | re.VERBOSE)
+
+
+def legacy_postprocess(sql):
+    sql = _LEGACY_KEYWORD_RE.sub(lambda m: 'in (?)' if m.lastgroup else m.group().lower(), sql)
+    sql = re.sub(r'\s+', ' ', sql)
+    if '`' in sql:
+        sql = re.sub(r'`([^`]+)`', r'\1', sql)
+    return sql.strip()
+
+
+def legacy_normalize(sql):
+    formatted = sqlparse.format(sql, keyword_case='lower', identifier_case='lower', strip_comments=True,
+                                reindent=True, normalize_whitespace=True)
+    parsed = sqlparse.parse(formatted)
+    return legacy_postprocess(core._render_statement(parsed[0])) if parsed else ""
+
+
+def legacy_fingerprint(data):
+    sql = bytes(data).decode('utf-8')
+    collapsed = collapse_bulk(sql)
+    if collapsed is not sql:
+        result = legacy_normalize(collapsed)
+        if MARKER not in result:
+            return result
+    return legacy_normalize(sql)
+
+
+def make_query(columns):
+    select = ', '.join(f"CASE WHEN c{i} > {i} THEN 'v{i}' ELSE NULL END AS a{i}" for i in range(columns))
+    where = ' AND '.join(f"t.c{i}   =   {i * 7}" for i in range(columns))
+    return f"SELECT {select}\n  FROM big_table t  -- comment\n WHERE {where} AND t.id IN (1, 2, 3)"
+
+
+def count_tokens(func, arg):
+    created = 0
+    init = S.Token.__init__
+
+    def counting_init(self, *args):
+        nonlocal created
+        created += 1
+        init(self, *args)
+
+    S.Token.__init__ = counting_init
+    try:
+        func(arg)
+    finally:
+        S.Token.__init__ = init
+    return created
+
+
+def measure(func, data):
+    seconds = min(timeit.repeat(lambda: func(data), number=3, repeat=3)) / 3
+    tracemalloc.start()
+    func(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, count_tokens(func, data)
+
+
+def main():
+    fingerprinter = SQLFingerprinter()
+    for columns in (40, 120):
+        data = memoryview(make_query(columns).encode('utf-8'))
+        assert fingerprinter.fingerprint(data) == legacy_fingerprint(data)
+        print(f"{len(data)} bytes")
+        for name, func in (('legacy', legacy_fingerprint), ('current', fingerprinter.fingerprint)):
+            seconds, peak, tokens = measure(func, data)
+            print(f"  {name:8} {seconds * 1e3:8.1f} ms/call  {peak / 1024:9.1f} KiB peak  {tokens:7} tokens")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Micro-benchmark of fingerprinting with parameter extraction.
+
+Compares ``fingerprint_params`` with calling ``fingerprint`` and parsing the
+query a second time with sqlparse to pull out its literals, which is what
+sampling and EXPLAIN replay had to do before. Also reports the memory held by
+one result. Run with ``python benchmarks/bench_params.py``.
+"""
+import sys
+import timeit
+
+import sqlparse
+from sqlparse import tokens as T
+
+from sqlfingerprint import SQLFingerprinter
+
+QUERIES = {
+    'point': "SELECT * FROM users WHERE id = 42 AND status = 'active'",
+    'report': ("SELECT u.name, count(*) FROM users u JOIN orders o ON o.user_id = u.id "
+               "WHERE o.created_at > '2024-01-01' AND o.total BETWEEN 10.5 AND 99.5 "
+               "AND o.region IN (1, 2, 3, 4) GROUP BY u.name HAVING count(*) > 3 ORDER BY 2 DESC LIMIT 50"),
+}
+
+
+def two_pass(fingerprinter, sql):
+    fingerprint = fingerprinter.fingerprint(sql)
+    literals = [token.value for token in sqlparse.parse(sql)[0].flatten() if token.ttype in T.Literal]
+    return fingerprint, literals
+
+
+def deep_size(result):
+    size = sys.getsizeof(result) + sys.getsizeof(result.parameters)
+    for parameter in result.parameters:
+        size += sys.getsizeof(parameter) + sum(sys.getsizeof(field) for field in parameter[:2])
+    return size
+
+
+def main():
+    for engine in ('sqlparse', 'fast'):
+        fingerprinter = SQLFingerprinter(engine=engine)
+        for label, sql in QUERIES.items():
+            for name, func in (('two-pass', lambda: two_pass(fingerprinter, sql)),
+                               ('params', lambda: fingerprinter.fingerprint_params(sql))):
+                seconds = min(timeit.repeat(func, number=200, repeat=3)) / 200
+                print(f"{engine:8} {label:6} {name:8} {seconds * 1e6:8.1f} us/call")
+            result = fingerprinter.fingerprint_params(sql)
+            print(f"{engine:8} {label:6} result   {deep_size(result):8} bytes for "
+                  f"{len(result.parameters)} parameters (fingerprint not counted)")
+
+
+if __name__ == '__main__':
+    main()
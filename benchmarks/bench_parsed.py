@@ -0,0 +1,42 @@
+"""Micro-benchmark of fingerprinting statements that are already parsed.
+
+A caller that has run ``sqlparse.parse`` for its own purposes can either pass
+the statement's text to ``fingerprint``, which lexes and parses it again, or
+pass the statement to ``fingerprint_parsed``. Reports time per call for both,
+for each engine. Run with ``python benchmarks/bench_parsed.py``.
+"""
+import timeit
+
+import sqlparse
+
+from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint import core
+
+QUERIES = {
+    'point': "SELECT * FROM users WHERE id = 42 AND status = 'active'",
+    'report': ("SELECT u.name, count(*) FROM users u JOIN orders o ON o.user_id = u.id "
+               "WHERE o.created_at > '2024-01-01' AND o.total BETWEEN 10.5 AND 99.5 "
+               "AND o.region = 3 GROUP BY u.name HAVING count(*) > 3 ORDER BY 2 DESC LIMIT 50"),
+    'nested': "SELECT id FROM t WHERE a IN (SELECT b FROM u WHERE c = (SELECT max(d) FROM v WHERE e = 'x'))",
+}
+
+
+def main():
+    for engine in ('sqlparse', 'fast'):
+        fingerprinter = SQLFingerprinter(engine=engine)
+        for label, sql in QUERIES.items():
+            stmt = sqlparse.parse(sql)[0]
+            assert fingerprinter.fingerprint_parsed(stmt) == fingerprinter.fingerprint(sql)
+            candidates = [('text', lambda: fingerprinter.fingerprint(str(stmt))),
+                          ('parsed', lambda: fingerprinter.fingerprint_parsed(stmt))]
+            if engine == 'fast':
+                # What fingerprint_parsed would cost if the fast engine used the tree.
+                candidates.append(('tree', lambda: fingerprinter._fingerprint_sqlparse(str(stmt), parsed=stmt)))
+            for name, func in candidates:
+                seconds = min(timeit.repeat(func, number=100, repeat=3)) / 100
+                print(f"{engine:8} {label:6} {name:6} {seconds * 1e6:8.1f} us/call")
+
+
+if __name__ == '__main__':
+    core._load()
+    main()
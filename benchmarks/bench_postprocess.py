@@ -0,0 +1,37 @@
+"""Micro-benchmark of the post-processing stage.
+
+Compares ``postprocess`` with the chain of ``re.sub`` passes it replaced on
+short and long statements. Run with ``python benchmarks/bench_postprocess.py``.
+"""
+import re
+import timeit
+
+from sqlfingerprint.postprocess import postprocess
+
+
+def legacy_postprocess(sql):
+    sql = re.sub(r'in\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', 'in (?)', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\(\s+', '( ', sql)
+    sql = re.sub(r'\s+\)', ' )', sql)
+    for keyword in ['like', 'in', 'and', 'or', 'not', 'exists', 'is null']:
+        sql = re.sub(rf'\b{keyword}\b', keyword, sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\s+', ' ', sql)
+    sql = re.sub(r'`([^`]+)`', r'\1', sql)
+    return sql.strip()
+
+
+SHORT = "select id, name from users where age > ? and name like ?"
+LONG = ("select o.id, c.name from orders o join customers c on o.customer_id = c.id "
+        "where o.status in (?, ?, ?) and c.region = ? or o.total > ? ") * 50
+
+
+def main():
+    for label, sql in (('short', SHORT), ('long', LONG)):
+        assert postprocess(sql) == legacy_postprocess(sql)
+        for name, func in (('legacy', legacy_postprocess), ('fused', postprocess)):
+            number, total = timeit.Timer(lambda: func(sql)).autorange()
+            print(f"{label:5} {name:6} {total / number * 1e6:10.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,34 @@
-from .core import SQLFingerprinter
 from .exceptions import SQLFingerprintError, SQLParseError
 
-__all__ = ['SQLFingerprinter', 'SQLFingerprintError', 'SQLParseError']
+__all__ = ['SQLFingerprinter', 'FingerprintCache', 'CacheStats', 'PersistentCache', 'FingerprintIndex',
+           'Aggregator', 'Instrumentation', 'InstrumentationStats', 'DegradedFingerprint',
+           'ParameterizedFingerprint', 'Parameter', 'SQLFingerprintError', 'SQLParseError']
+
+# Submodule holding each public name that is imported on first access, so
+# that ``import sqlfingerprint`` stays cheap in short-lived processes.
+_LAZY = {
+    'SQLFingerprinter': 'core',
+    'FingerprintCache': 'cache',
+    'CacheStats': 'cache',
+    'PersistentCache': 'persistent',
+    'FingerprintIndex': 'index',
+    'Aggregator': 'aggregate',
+    'Instrumentation': 'instrument',
+    'InstrumentationStats': 'instrument',
+    'DegradedFingerprint': 'degrade',
+    'ParameterizedFingerprint': 'params',
+    'Parameter': 'params',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(__import__(f'{__name__}.{module}', fromlist=[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,226 @@
+"""Per-fingerprint aggregation of query logs.
+
+``Aggregator`` groups (sql, duration, rows) records by fingerprint the way
+pt-query-digest does, keeping counts, latency totals and a mergeable quantile
+sketch for each. With ``capacity`` set it only tracks the heaviest
+fingerprints using the Space-Saving algorithm, so memory stays bounded on logs
+with millions of distinct shapes. Aggregators built by separate workers can
+be combined with ``merge``.
+"""
+import heapq
+import math
+
+from .core import SQLFingerprinter
+
+
+class LatencySketch:
+    """Mergeable quantile sketch with bounded relative error.
+
+    Values are counted in logarithmically sized buckets (as in DDSketch), so
+    a quantile is off by at most ``relative_accuracy`` times its value.
+    """
+
+    __slots__ = ('gamma', '_log_gamma', 'buckets', 'zeros', 'count')
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return the estimated `q`-quantile, or None if the sketch is empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class FingerprintStats:
+    """Aggregated statistics of one fingerprint.
+
+    ``error`` is the most ``count`` may overestimate the true count by; it is
+    only non-zero for fingerprints that replaced an evicted one in a bounded
+    ``Aggregator`` or were merged from one that may have evicted them.
+    ``total``, ``min``, ``max``, ``rows``, the quantiles and ``mean`` only
+    cover the ``count - error`` records actually seen.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'rows', 'error', 'sketch')
+
+    def __init__(self, relative_accuracy=0.01):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.rows = 0
+        self.error = 0
+        self.sketch = LatencySketch(relative_accuracy) if relative_accuracy else None
+
+    def add(self, duration, rows=0):
+        self.count += 1
+        self.total += duration
+        self.rows += rows
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        if self.sketch is not None:
+            self.sketch.add(duration)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.rows += other.rows
+        self.error += other.error
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        seen = self.count - self.error
+        return self.total / seen if seen else None
+
+    def quantile(self, q):
+        """Return the estimated `q`-quantile of the durations, or None."""
+        return self.sketch.quantile(q) if self.sketch is not None else None
+
+
+class Aggregator:
+    """Group query records by fingerprint.
+
+    ``capacity`` bounds the number of tracked fingerprints; when it is
+    reached a new fingerprint replaces the one with the lowest count and
+    inherits that count (Space-Saving), so every fingerprint more frequent
+    than ``total records / capacity`` is guaranteed to be kept.
+    ``relative_accuracy`` configures the latency sketches; pass 0 to disable
+    them.
+    """
+
+    def __init__(self, fingerprinter=None, capacity=None, relative_accuracy=0.01):
+        if capacity is not None and capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.fingerprinter = fingerprinter if fingerprinter is not None else SQLFingerprinter()
+        self.capacity = capacity
+        self.relative_accuracy = relative_accuracy
+        self.stats = {}
+        self.records = 0
+        # Min-heap of (count, fingerprint) used to find eviction victims in
+        # bounded mode; entries are refreshed lazily when popped.
+        self._heap = []
+
+    def __len__(self):
+        return len(self.stats)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.stats
+
+    def __getitem__(self, fingerprint):
+        return self.stats[fingerprint]
+
+    def add(self, sql, duration, rows=0):
+        """Fingerprint `sql` and record it. Returns the fingerprint."""
+        fingerprint = self.fingerprinter.fingerprint(sql)
+        self.add_fingerprint(fingerprint, duration, rows)
+        return fingerprint
+
+    def add_fingerprint(self, fingerprint, duration, rows=0):
+        """Record a query whose fingerprint is already known."""
+        self.records += 1
+        stats = self.stats.get(fingerprint)
+        if stats is None:
+            stats = FingerprintStats(self.relative_accuracy)
+            if self.capacity is not None and len(self.stats) >= self.capacity:
+                evicted = self._evict()
+                stats.count = stats.error = evicted.count
+            self.stats[fingerprint] = stats
+            stats.add(duration, rows)
+            if self.capacity is not None:
+                heapq.heappush(self._heap, (stats.count, fingerprint))
+        else:
+            stats.add(duration, rows)
+
+    def _evict(self):
+        heap = self._heap
+        while True:
+            count, fingerprint = heapq.heappop(heap)
+            stats = self.stats[fingerprint]
+            if stats.count == count:
+                del self.stats[fingerprint]
+                return stats
+            heapq.heappush(heap, (stats.count, fingerprint))
+
+    def _floor(self):
+        # The most a fingerprint missing from a full bounded aggregator may
+        # have occurred in its records: its lowest count.
+        if self.capacity is None or len(self.stats) < self.capacity:
+            return 0
+        return min(stats.count for stats in self.stats.values())
+
+    def merge(self, other):
+        """Add the records of another aggregator to this one.
+
+        A fingerprint missing from a full bounded aggregator may have been
+        evicted from it, so it is credited with that aggregator's lowest
+        count, as both count and error (mergeable Space-Saving); the merged
+        counts keep bounding the true ones. In bounded mode only the
+        ``capacity`` fingerprints with the highest combined counts are kept.
+        """
+        my_floor, other_floor = self._floor(), other._floor()
+        if other_floor:
+            for fingerprint, stats in self.stats.items():
+                if fingerprint not in other.stats:
+                    stats.count += other_floor
+                    stats.error += other_floor
+        for fingerprint, stats in other.stats.items():
+            mine = self.stats.get(fingerprint)
+            if mine is None:
+                mine = self.stats[fingerprint] = FingerprintStats(self.relative_accuracy)
+                mine.count = mine.error = my_floor
+            mine.merge(stats)
+        self.records += other.records
+        if self.capacity is not None:
+            if len(self.stats) > self.capacity:
+                keep = heapq.nlargest(self.capacity, self.stats.items(), key=lambda item: item[1].count)
+                self.stats = dict(keep)
+            self._heap = [(stats.count, fingerprint)
+                          for fingerprint, stats in self.stats.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, k, by='count'):
+        """Return the `k` ``(fingerprint, stats)`` pairs with the largest
+        value of the stats attribute `by`, e.g. ``'count'`` or ``'total'``.
+        """
+        return heapq.nlargest(k, self.stats.items(), key=lambda item: getattr(item[1], by))
@@ -0,0 +1,118 @@
+"""asyncio front end for SQLFingerprinter.
+
+Fingerprinting is CPU-bound, so calling it inline blocks the event loop for as
+long as a large statement takes. ``AsyncFingerprinter`` runs statements longer
+than ``inline_threshold`` characters (bytes for binary input) in an executor,
+caps the number of them in flight and, when iterating, only pulls the next
+statement from the source once there is room, so producers are slowed down
+instead of piling up work.
+"""
+import asyncio
+import collections
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from .core import BINARY_TYPES, SQLFingerprinter
+from .exceptions import SQLFingerprintError
+
+DEFAULT_INLINE_THRESHOLD = 512
+DEFAULT_MAX_CONCURRENCY = 8
+_TEXT_TYPES = (str,) + BINARY_TYPES
+
+# Fingerprinters created in process pool workers, by their settings.
+_process_fingerprinters = {}
+
+
+def _fingerprint_in_process(options, sql):
+    key = tuple(sorted(options.items()))
+    fingerprinter = _process_fingerprinters.get(key)
+    if fingerprinter is None:
+        fingerprinter = _process_fingerprinters[key] = SQLFingerprinter(**options)
+    return fingerprinter.fingerprint(sql)
+
+
+class AsyncFingerprinter:
+    """Fingerprint queries from coroutines without blocking the event loop.
+
+    ``executor`` is any ``concurrent.futures`` executor; None uses the loop's
+    default thread pool. A ``ProcessPoolExecutor`` sidesteps the GIL and keeps
+    the loop responsive even on multi-MB statements; its workers use the
+    fingerprinter's engine and limits but not its caches or instrumentation.
+    At most ``max_concurrency`` statements are handed to the executor at a
+    time.
+    """
+
+    def __init__(self, fingerprinter=None, executor=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, inline_threshold=DEFAULT_INLINE_THRESHOLD):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.fingerprinter = fingerprinter if fingerprinter is not None else SQLFingerprinter()
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.inline_threshold = inline_threshold
+        self._semaphore = None
+
+    async def afingerprint(self, sql):
+        """Return the fingerprint of `sql`."""
+        if self._inline(sql):
+            return self.fingerprinter.fingerprint(sql)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await self._offload(sql)
+
+    async def afingerprint_iter(self, statements):
+        """Fingerprint an iterable or async iterable of statements.
+
+        Yields results in input order. A statement that fails yields its
+        ``SQLFingerprintError`` instead of a fingerprint. No more than
+        ``max_concurrency`` statements are pending at any time.
+        """
+        loop = asyncio.get_running_loop()
+        pending = collections.deque()
+        try:
+            async for sql in _aiter(statements):
+                if len(pending) >= self.max_concurrency:
+                    yield await _result(pending.popleft())
+                if self._inline(sql):
+                    future = loop.create_future()
+                    try:
+                        future.set_result(self.fingerprinter.fingerprint(sql))
+                    except SQLFingerprintError as e:
+                        future.set_exception(e)
+                else:
+                    future = asyncio.ensure_future(self._offload(sql))
+                pending.append(future)
+            while pending:
+                yield await _result(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _inline(self, sql):
+        return not isinstance(sql, _TEXT_TYPES) or len(sql) <= self.inline_threshold
+
+    def _offload(self, sql):
+        loop = asyncio.get_running_loop()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            func = functools.partial(_fingerprint_in_process, self.fingerprinter._options(),
+                                     self.fingerprinter._picklable(sql))
+        else:
+            func = functools.partial(self.fingerprinter.fingerprint, sql)
+        return loop.run_in_executor(self.executor, func)
+
+
+async def _result(future):
+    try:
+        return await future
+    except SQLFingerprintError as e:
+        return e
+
+
+async def _aiter(statements):
+    if hasattr(statements, '__aiter__'):
+        async for sql in statements:
+            yield sql
+    else:
+        for sql in statements:
+            yield sql
@@ -0,0 +1,86 @@
+"""Collapse bulk literal lists before a statement is normalized.
+
+``IN (1, 2, ..., 10000)`` and multi-row ``VALUES (...), (...), ...`` make
+sqlparse build a token object for every element (and refuse statements of more
+than 10000 tokens), and make the single-pass lexer walk every element. Both
+end up as one placeholder group in the fingerprint, so ``collapse_bulk``
+replaces such lists with a single placeholder in one regex scan of the raw
+text:
+
+* ``IN (<literal>, <literal>, ...)`` becomes ``IN (?)``;
+* ``VALUES (<literals>), (<literals>), ...`` with two or more rows becomes
+  ``VALUES (?)``.
+
+A literal is a number (signed, decimal, with an exponent or hexadecimal),
+NULL, TRUE, FALSE, a ``?`` placeholder or a single-quoted string, so that
+whether a list collapses depends on its structure rather than on how its
+values are spelled. Strings, quoted identifiers and comments are skipped as
+whole tokens so that nothing inside them is rewritten.
+
+String literals in the SELECT clause are kept in fingerprints, which the scan
+cannot see. A list holding strings is therefore replaced by ``MARKER`` instead
+of ``?``; if the marker shows up in the fingerprint the caller fingerprints
+the original text instead.
+"""
+import re
+
+MARKER = "'sqlfingerprint:bulk'"
+
+# A literal element. Strings end where sqlparse ends them, a backslash
+# escaping the quote after it, and no alternative can backtrack into a
+# shorter string: ``\\(?!')`` is the only way to match a backslash not
+# followed by a quote.
+_LITERAL = r"""(?:
+    [-+]?(?:0x[\da-f]+|(?:\d+(?:\.\d*)?|\.\d+)(?:e[-+]?\d+)?)(?![\w.])
+  | (?:null|true|false)(?![\w$])
+  | \?(?![\w|&])
+  | '(?:''|\\'|[^'\\]|\\(?!'))*')"""
+_ROW = r'\(\s*%s(?:\s*,\s*%s)*\s*\)' % (_LITERAL, _LITERAL)
+
+# The skipped tokens use sqlparse's own patterns so that the scan agrees with
+# it on where strings, names and comments start and end.
+_BULK_RE = re.compile(r"""
+    (?P<skip>'(?:''|\\'|[^'])*'|"(?:""|\\"|[^"])*"|`(?:``|[^`])*`
+      | (?<![\w\])])\[[^\]\[]+\]
+      | (?:--|\#\ )[^\r\n]*|/\*.*?\*/)
+  | (?<![\w.@#$:])(?P<in>in)\s*\(\s*(?P<items>%s(?:\s*,\s*%s)+)\s*\)
+  | (?<![\w.@#$:])(?P<values>values)\s*(?P<rows>%s(?:\s*,\s*%s)+)(?!\s*,)
+""" % (_LITERAL, _LITERAL, _ROW, _ROW), re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+_HINT_RE = re.compile(r'(?:in|values)\s*\(', re.IGNORECASE)
+_ITEM_RE = re.compile(_LITERAL, re.IGNORECASE | re.VERBOSE)
+# Elements that are not replaced literals outside bulk lists either.
+_NOT_PARAMETERS = ('?', 'null')
+
+
+def _replace(m):
+    kind = m.lastgroup
+    if kind == 'skip':
+        return m.group()
+    keyword = m.group('in' if kind == 'items' else 'values')
+    placeholder = MARKER if "'" in m.group(kind) else '?'
+    return f'{keyword} ({placeholder})'
+
+
+def _recorder(params):
+    def replace(m):
+        replacement = _replace(m)
+        kind = m.lastgroup
+        if kind != 'skip':
+            offset = m.start(kind)
+            params.add_span(m.start(), m.end(), len(replacement), [
+                (offset + item.start(), item.group()) for item in _ITEM_RE.finditer(m.group(kind))
+                if item.group().lower() not in _NOT_PARAMETERS])
+        return replacement
+    return replace
+
+
+def collapse_bulk(sql, params=None):
+    """Return `sql` with bulk literal lists collapsed, or `sql` itself if
+    there are none. The literals of collapsed lists are added to `params`, a
+    ``params._Collector``, if given.
+    """
+    if _HINT_RE.search(sql) is None:
+        return sql
+    collapsed = _BULK_RE.sub(_replace if params is None else _recorder(params), sql)
+    return sql if collapsed == sql else collapsed
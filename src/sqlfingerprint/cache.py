@@ -0,0 +1,73 @@
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheStats = namedtuple('CacheStats', 'hits misses evictions size bytes')
+
+
+class FingerprintCache:
+    """Thread-safe LRU mapping of raw SQL text to its fingerprint.
+
+    The cache holds at most ``max_entries`` entries and, if ``max_bytes`` is
+    given, at most that many bytes of keys and values as measured by
+    ``sys.getsizeof``. The least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=None):
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, sql):
+        """Return the cached fingerprint of `sql`, or None."""
+        with self._lock:
+            try:
+                value = self._data[sql]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._data.move_to_end(sql)
+            self._hits += 1
+            return value[0]
+
+    def put(self, sql, fingerprint):
+        """Store the fingerprint of `sql`, evicting old entries if needed."""
+        size = sys.getsizeof(sql) + sys.getsizeof(fingerprint)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(sql, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[sql] = (fingerprint, size)
+            self._bytes += size
+            while (self.max_entries is not None and len(self._data) > self.max_entries
+                   or self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self):
+        """Return a CacheStats snapshot."""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions,
+                              len(self._data), self._bytes)
@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+from .core import ENGINES, SQLFingerprinter
+from .stream import fingerprint_stream, open_source
+
+
+def _write_jsonl(out, row):
+    out.write(json.dumps({'fingerprint': row.fingerprint, 'offset': row.offset,
+                          'digest': row.digest}))
+    out.write('\n')
+
+
+def _write_tsv(out, row):
+    out.write(f"{row.fingerprint}\t{row.offset}\t{row.digest}\n")
+
+
+WRITERS = {'jsonl': _write_jsonl, 'tsv': _write_tsv}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='sqlfingerprint',
+        description='Fingerprint every SQL statement in a file or stdin.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file to read, gzip-compressed or plain (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='file to write (default: stdout)')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='jsonl',
+                        help='output format (default: jsonl)')
+    parser.add_argument('--engine', choices=ENGINES, default='sqlparse',
+                        help='normalizer to use (default: sqlparse)')
+    parser.add_argument('--encoding', default='utf-8', help='input encoding (default: utf-8)')
+    parser.add_argument('--mmap', action='store_true', help='memory-map the input file')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fingerprinter = SQLFingerprinter(engine=args.engine)
+    write = WRITERS[args.format]
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    failed = 0
+    try:
+        with open_source(args.input, use_mmap=args.mmap) as source:
+            for row in fingerprint_stream(source, fingerprinter, encoding=args.encoding):
+                if row.digest is None:
+                    failed += 1
+                    print(f"sqlfingerprint: offset {row.offset}: {row.fingerprint}", file=sys.stderr)
+                else:
+                    write(out, row)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
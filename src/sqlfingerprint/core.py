@@ -1,103 +1,718 @@
-import re
-
-import sqlparse
-from sqlparse.sql import Token, TokenList
+import time
 
 from .exceptions import SQLFingerprintError
 
+ENGINES = ('sqlparse', 'fast')
+DEFAULT_CHUNKSIZE = 256
+# Chunks fingerprint_many keeps in flight per pool worker: enough to keep the
+# workers busy while the consumer takes results, and few enough that memory
+# does not grow with the input.
+CHUNKS_PER_WORKER = 2
+DEFAULT_ENCODING = 'utf-8'
+# Binary input types, decoded with the fingerprinter's encoding.
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+# Version of the normalization rules. Bump it with any change that alters the
+# fingerprint of some query, so that fingerprints persisted by older releases
+# (see persistent.py) are not served.
+FINGERPRINT_VERSION = 4
+
+# sqlparse, the normalizer modules and the regular expressions below take
+# most of the package's import time, so they are loaded by _load() when the
+# first query is fingerprinted rather than when the package is imported. The
+# fast engine, the digest functions and degraded fingerprints have loaders of
+# their own as not every process needs them.
+_loaded = False
+sqlparse = formatter = T = None
+MARKER = collapse_bulk = fast_fingerprint = postprocess = None
+fingerprint_digest = format_digest = None
+degraded_fingerprint = exceeds_tokens = None
+_SHAPE_RE = _BOOLEAN_TYPES = _FORMAT_OPTIONS = None
+
+# Tokens the shape key masks or keeps verbatim. Comments and quoted
+# identifiers are matched with sqlparse's patterns, as in bulk.py, so that
+# quotes and digits inside them are neither taken for literals nor masked.
+# Numbers are masked only when sqlparse lexes them as one token, so that
+# e.g. 1e+3 (which it does not) keeps its own shape.
+_SHAPE_PATTERN = r"""
+    (?P<keep>--[^\r\n]*|\#\ [^\r\n]*|/\*.*?\*/|"(?:""|\\"|[^"])*"|`(?:``|[^`])*`
+      | (?<![\w\])])\[[^\]\[]+\])
+  | (?P<string>'(?:''|\\'|[^'])*')
+  | (?P<number>(?<![\w.$:@\#\\])\d+(?:\.\d+)?(?:e-?\d+)?(?![\w.]))
+  | (?P<ws>\s+)
+"""
+
+def _load():
+    """Import and compile everything needed to fingerprint queries.
+
+    ``_loaded`` is set last, so a thread that sees it set sees the rest too.
+    """
+    global _loaded, sqlparse, formatter, T, MARKER, collapse_bulk, postprocess
+    global _SHAPE_RE, _BOOLEAN_TYPES, _FORMAT_OPTIONS
+    import re
+
+    import sqlparse
+    from sqlparse import formatter
+    from sqlparse import tokens as T
+
+    from .bulk import MARKER, collapse_bulk
+    from .postprocess import postprocess
+
+    _SHAPE_RE = re.compile(_SHAPE_PATTERN, re.IGNORECASE | re.DOTALL | re.VERBOSE)
+    _BOOLEAN_TYPES = (T.Name.Builtin, T.Keyword)
+    _FORMAT_OPTIONS = formatter.validate_options({
+        'keyword_case': 'lower',
+        'identifier_case': 'lower',
+        'strip_comments': True,
+        'reindent': True,
+        'normalize_whitespace': True,
+    })
+    _loaded = True
+
+
+def _load_lexer():
+    global fast_fingerprint
+    from .lexer import fast_fingerprint
+
+
+def _load_digest():
+    global format_digest, fingerprint_digest
+    from .digest import format_digest, fingerprint_digest
+
+
+def _load_degrade():
+    global degraded_fingerprint, exceeds_tokens
+    from .degrade import degraded_fingerprint, exceeds_tokens
+
+
+def _mask_shape(m):
+    kind = m.lastgroup
+    if kind == 'string':
+        return "'?'"
+    if kind == 'number':
+        return '?'
+    if kind == 'ws':
+        text = m.group()
+        # Line breaks end "--" comments, so they are kept apart from spaces.
+        return '\n' if '\n' in text or '\r' in text else ' '
+    return m.group()
+
+
+def shape_key(sql):
+    """Return `sql` with string and numeric literals and whitespace masked.
+
+    Queries that differ only in literal values or in the amount of whitespace
+    share a shape key, and share a fingerprint unless a string literal is
+    kept verbatim in it (see ``SQLFingerprinter.fingerprint``).
+    """
+    if not _loaded:
+        _load()
+    try:
+        return _SHAPE_RE.sub(_mask_shape, sql)
+    except TypeError as e:
+        raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
+
+
+def split_statements(sql):
+    """Yield ``(offset, statement)`` for each statement of a script.
+
+    Statements end at semicolons outside strings, quoted identifiers and
+    comments, by the rules in ``split.py`` that ``fingerprint_stream`` uses
+    too; the semicolon is not included. ``offset`` is the index of the
+    statement's first non-whitespace character. Blank statements are skipped.
+    """
+    from .split import scan_statements
+    start = 0
+    for stop in scan_statements(sql)[0]:
+        yield from _statement(sql, start, stop)
+        start = stop + 1
+    yield from _statement(sql, start, len(sql))
+
+
+def _statement(sql, start, stop):
+    statement = sql[start:stop]
+    stripped = statement.lstrip()
+    if stripped:
+        yield start + len(statement) - len(stripped), stripped
+
+
+_SELECT_END = ('from', 'where', 'group', 'having', 'order')
+
+
+def _render_statement(stmt, params=None):
+    """Return the text of a parsed statement with its literals replaced.
+
+    String literals in the top-level SELECT clause are kept; every other
+    literal, and TRUE and FALSE, becomes "?". The tree is walked with an
+    explicit stack and left untouched, so deep nesting costs neither
+    recursion nor a new token per literal.
+
+    With `params`, a ``params._Collector`` whose ``process`` filter saw the
+    statement lexed, the replaced literals are added to it.
+    """
+    if not _loaded:
+        _load()
+    if params is not None:
+        from .params import token_type
+        tokens = iter(params.tokens)
+    out = []
+    append = out.append
+    in_select = False
+    for token in stmt.tokens:
+        if token.is_keyword:
+            value = token.value.lower()
+            if value == 'select':
+                in_select = True
+            elif in_select and value in _SELECT_END:
+                in_select = False
+
+        stack = [iter((token,))]
+        while stack:
+            for leaf in stack[-1]:
+                if leaf.is_group:
+                    stack.append(iter(leaf.tokens))
+                    break
+                ttype = leaf.ttype
+                if ttype in T.Literal.String and in_select:
+                    append(leaf.value)
+                    if params is not None:
+                        next(tokens)
+                elif ttype in T.Literal or ttype in _BOOLEAN_TYPES and leaf.value.lower() in ('true', 'false'):
+                    append('?')
+                    if params is not None:
+                        position, value, ttype = next(tokens)
+                        params.add(position, value, token_type(ttype))
+                else:
+                    append(leaf.value)
+            else:
+                stack.pop()
+    return ''.join(out)
+
+
+def _copy_token(token, parent):
+    copy = token.__class__.__new__(token.__class__)
+    copy.value = token.value
+    copy.ttype = token.ttype
+    copy.parent = parent
+    copy.normalized = token.normalized
+    copy.is_keyword = token.is_keyword
+    copy.is_group = token.is_group
+    copy.is_whitespace = token.is_whitespace
+    copy.is_newline = token.is_newline
+    return copy
+
+
+def _copy_statement(stmt, preprocess):
+    """Return a copy of a parsed statement with the `preprocess` filters
+    (case folding) applied to its leaves, as if it had been parsed with them.
+
+    The formatting filters rewrite the tree they are given, so they get the
+    copy. Copying keeps the caller's grouping and costs less than lexing and
+    grouping the text again.
+    """
+    root = _copy_token(stmt, None)
+    root.tokens = []
+    groups = [root]
+    leaves = []
+    stack = [(iter(stmt.tokens), root)]
+    while stack:
+        tokens, parent = stack[-1]
+        for token in tokens:
+            copy = _copy_token(token, parent)
+            parent.tokens.append(copy)
+            if token.is_group:
+                copy.tokens = []
+                groups.append(copy)
+                stack.append((iter(token.tokens), copy))
+                break
+            leaves.append(copy)
+        else:
+            stack.pop()
+
+    stream = ((leaf.ttype, leaf.value) for leaf in leaves)
+    for filter_ in preprocess:
+        stream = filter_.process(stream)
+    for leaf, (_, value) in zip(leaves, stream):
+        leaf.value = value
+        leaf.normalized = value.upper() if leaf.is_keyword else value
+    # Children were copied after their parents.
+    for group in reversed(groups):
+        group.value = ''.join(token.value for token in group.tokens)
+    return root
+
+
+def _group_tokens(tokens, preprocess):
+    """Group the first statement of a stream of ``(ttype, value)`` pairs the
+    way ``FilterStack.run`` groups lexed text.
+    """
+    from sqlparse.engine import StatementSplitter, grouping
+
+    stream = iter(tokens)
+    for filter_ in preprocess:
+        stream = filter_.process(stream)
+    stmt = next(StatementSplitter().process(stream), None)
+    return None if stmt is None else grouping.group(stmt)
+
+
+class _BudgetExceeded(BaseException):
+    """Raised by _Timer.lap past the deadline.
+
+    It is a BaseException so that the ``except Exception`` clauses turning
+    errors into SQLFingerprintError let it through.
+    """
+
+
+class _Timer:
+    """Split the time of one fingerprint call into stages and enforce its
+    time budget.
+    """
+
+    __slots__ = ('start', 'last', 'stages', 'deadline')
+
+    def __init__(self, budget=None):
+        self.start = self.last = time.perf_counter()
+        self.stages = {}
+        self.deadline = None if budget is None else self.start + budget
+
+    def lap(self, stage, last=False):
+        """Charge the time since the previous lap to `stage`.
+
+        Past the deadline, raise _BudgetExceeded before the next stage
+        starts; a `last` stage has completed the fingerprint, which is kept.
+        """
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+        if not last and self.deadline is not None and now > self.deadline:
+            raise _BudgetExceeded
+
+
+# Fingerprinter used by fingerprint_many pool workers, set by _init_worker.
+_worker = None
+
+
+def _init_worker(options):
+    global _worker
+    _worker = SQLFingerprinter(**options)
+
+
+def _fingerprint_chunk(chunk):
+    return [_worker._fingerprint_or_error(sql) for sql in chunk]
+
+
+def _fingerprint_indexed_chunk(start, chunk):
+    return [(index, _worker._fingerprint_or_error(sql)) for index, sql in enumerate(chunk, start)]
+
+
+def _next_done(done):
+    """Wait for the results of the next chunk a pool finishes, or raise the
+    error that failed it."""
+    results = done.get()
+    if isinstance(results, BaseException):
+        raise results
+    return results
+
 
 class SQLFingerprinter:
+    def __init__(self, engine='sqlparse', cache=None, shape_cache=None, instrumentation=None,
+                 max_length=None, max_tokens=None, time_budget=None, degraded_prefix=None,
+                 encoding=DEFAULT_ENCODING):
+        """Create a fingerprinter.
+
+        ``engine`` selects the normalizer: ``'sqlparse'`` formats and parses
+        every query with sqlparse, ``'fast'`` uses the single-pass lexer in
+        ``lexer.py`` and falls back to sqlparse for input it cannot handle.
+        Both produce the same fingerprints.
+
+        ``cache`` is an optional ``FingerprintCache`` consulted before
+        normalizing; it may be shared between fingerprinters and threads.
+        A cache with a ``bind`` method, such as ``PersistentCache``, is bound
+        to the fingerprinter's engine and limits.
+
+        ``shape_cache`` is an optional ``FingerprintCache`` keyed by
+        ``shape_key(sql)`` instead of the raw text, so that queries differing
+        only in literal values are normalized once. Its hit count is the
+        number of queries resolved without running the normalizer.
+
+        ``instrumentation`` is an optional ``Instrumentation`` that records
+        the time spent in each stage of sampled calls to ``fingerprint``.
+
+        ``max_length`` (characters), ``max_tokens`` (after bulk lists are
+        collapsed) and ``time_budget`` (seconds per call) bound the work done
+        per query. A query over a limit gets a ``DegradedFingerprint`` from
+        the linear-time scan in ``degrade.py`` instead, covering only its
+        first ``degraded_prefix`` characters if that is set. The time budget
+        is checked before each stage, so it cuts a call short after the stage
+        running when it expires unless that stage completed the fingerprint.
+
+        Queries may be ``str`` or ``bytes``, ``bytearray`` or ``memoryview``
+        holding text in ``encoding``. Binary input is decoded once, replacing
+        undecodable bytes with U+FFFD as ``fingerprint_stream`` does, before
+        caches or limits see it.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+        for name, limit in (('max_length', max_length), ('max_tokens', max_tokens),
+                            ('time_budget', time_budget), ('degraded_prefix', degraded_prefix)):
+            if limit is not None and limit <= 0:
+                raise ValueError(f"{name} must be positive")
+        self.engine = engine
+        self.cache = cache
+        self.shape_cache = shape_cache
+        self.instrumentation = instrumentation
+        self.max_length = max_length
+        self.max_tokens = max_tokens
+        self.time_budget = time_budget
+        self.degraded_prefix = degraded_prefix
+        self.encoding = encoding
+        for bindable in (cache, shape_cache):
+            if hasattr(bindable, 'bind'):
+                bindable.bind(self._options())
+        if max_length is not None or max_tokens is not None or time_budget is not None:
+            _load_degrade()
+
     def fingerprint(self, sql):
         """Generate a normalized SQL fingerprint."""
+        return self._fingerprint_text(self._decode(sql))
+
+    def fingerprint_parsed(self, statement):
+        """Fingerprint a statement sqlparse has already parsed.
+
+        `statement` is a ``sqlparse.sql.Statement``, e.g. from
+        ``sqlparse.parse``, or an iterable of its tokens as ``Token`` objects
+        or ``(ttype, value)`` pairs like ``sqlparse.lexer.tokenize`` yields.
+        The result is the fingerprint of the statement's text, and caches,
+        limits and instrumentation apply as for ``fingerprint``. The sqlparse
+        engine works on a copy of the statement's tokens instead of lexing
+        the text again, and never modifies `statement`. The text is
+        fingerprinted instead when it holds bulk lists, which are cheaper to
+        collapse as text, and by the fast engine, whose single scan costs
+        less than copying the tree.
+        """
+        if not _loaded:
+            _load()
+        if isinstance(statement, sqlparse.sql.TokenList):
+            sql = str(statement)
+        else:
+            try:
+                statement = [token if isinstance(token, tuple) else (token.ttype, token.value)
+                             for token in statement]
+                sql = ''.join(value for _, value in statement)
+            except Exception as e:
+                raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
+        return self._fingerprint_text(sql, statement)
+
+    def _fingerprint_text(self, sql, parsed=None, walker=None):
+        """Fingerprint decoded text, with caches, limits and instrumentation.
+
+        `walker`, if given, returns a fresh ``walk`` hook for each scan of
+        the fast lexer; see ``fast_fingerprint``.
+        """
         if not sql:
             return ""
 
+        sampled = self.instrumentation is not None and self.instrumentation.sample()
+        if not sampled and self.time_budget is None:
+            return self._lookup(sql, None, parsed, walker)
+        return self._timed_lookup(sql, sampled, parsed, walker)
+
+    def _timed_lookup(self, sql, sampled, parsed=None, walker=None):
+        timer = _Timer(self.time_budget)
         try:
-            # Parse and format the SQL with sqlparse
-            formatted = sqlparse.format(
-                sql,
-                keyword_case='lower',
-                identifier_case='lower',
-                strip_comments=True,
-                reindent=True,
-                normalize_whitespace=True
-            )
-
-            # Parse the formatted SQL into a statement
-            parsed = sqlparse.parse(formatted)
-            if not parsed:
-                return ""
+            result = self._lookup(sql, timer, parsed, walker)
+        except _BudgetExceeded:
+            result = self._degrade(sql, 'time', timer)
+        except SQLFingerprintError as e:
+            if sampled:
+                timer.deadline = None
+                self.instrumentation.record(sql, timer, e)
+            raise
+        if sampled:
+            timer.deadline = None
+            self.instrumentation.record(sql, timer)
+        return result
 
-            stmt = parsed[0]
+    def _lookup(self, sql, timer=None, parsed=None, walker=None):
+        if self.max_length is not None and isinstance(sql, str) and len(sql) > self.max_length:
+            return self._degrade(sql, 'length', timer)
 
-            # Find the SELECT clause to handle literals differently
-            select_tokens = []
-            in_select_clause = False
+        # Caches are keyed by text; other input fails in _fingerprint with
+        # the same error as without them.
+        if self.cache is None and self.shape_cache is None or not isinstance(sql, str):
+            return self._fingerprint(sql, timer, parsed=parsed, walker=walker)
 
-            for token in stmt.tokens:
-                if token.is_keyword and token.value.lower() == 'select':
-                    in_select_clause = True
-                elif in_select_clause and token.is_keyword and token.value.lower() in (
-                'from', 'where', 'group', 'having', 'order'):
-                    in_select_clause = False
+        if self.cache is not None:
+            result = self.cache.get(sql)
+            if result is not None:
+                return result
 
-                if in_select_clause and not token.is_whitespace:
-                    select_tokens.append(token)
+        if self.shape_cache is None:
+            result = self._fingerprint(sql, timer, parsed=parsed, walker=walker)
+        else:
+            key = shape_key(sql)
+            result = self.shape_cache.get(key)
+            if result is None:
+                result = self._fingerprint(sql, timer, parsed=parsed, walker=walker)
+                # String literals kept in the SELECT clause make the
+                # fingerprint depend on more than the shape, and degraded
+                # fingerprints are computed from the raw text.
+                if "'" not in result and getattr(result, 'reason', None) is None:
+                    self.shape_cache.put(key, result)
 
-            # Replace literals with placeholders
-            def _process_token(token, in_select=False):
-                # Handle string literals differently in SELECT clause
-                if token.ttype in sqlparse.tokens.Literal.String and in_select:
-                    return token  # Keep string literals in SELECT clause
+        if self.cache is not None:
+            self.cache.put(sql, result)
+        return result
 
-                # Handle literals (strings, numbers)
-                elif token.ttype in sqlparse.tokens.Literal:
-                    return Token(token.ttype, "?")
+    def fingerprint_params(self, sql):
+        """Fingerprint `sql` and return the literals replaced in it.
 
-                # Handle boolean literals
-                elif token.ttype in (sqlparse.tokens.Name.Builtin, sqlparse.tokens.Keyword) and token.value.lower() in (
-                        'true', 'false'):
-                    return Token(token.ttype, "?")
+        Returns a ``ParameterizedFingerprint`` (see ``params.py``) of the
+        fingerprint, a ``Parameter`` of text, type and offset per replaced
+        literal and whether a list was collapsed. The literals are gathered by
+        the scan and parse that compute the fingerprint. Caches and
+        instrumentation are not used, as queries sharing a fingerprint have
+        different literals. Limits apply; a degraded fingerprint comes with
+        ``parameters`` of None.
+        """
+        from .params import _Collector
+        sql = self._decode(sql)
+        params = _Collector()
+        if not sql:
+            return params.result("")
+        timer = None if self.time_budget is None else _Timer(self.time_budget)
+        try:
+            if self.max_length is not None and isinstance(sql, str) and len(sql) > self.max_length:
+                result = self._degrade(sql, 'length', timer)
+            else:
+                result = self._fingerprint(sql, timer, params)
+        except _BudgetExceeded:
+            result = self._degrade(sql, 'time', timer)
+        return params.result(result)
 
-                # Process groups recursively
-                elif token.is_group:
-                    for idx, child_token in enumerate(token.tokens):
-                        token.tokens[idx] = _process_token(child_token, in_select)
+    def fingerprint_statements(self, sql):
+        """Fingerprint every statement of a script.
 
-                return token
+        ``fingerprint`` only looks at the first statement of its input. This
+        generator splits `sql` in one scan and yields ``(offset, fingerprint)``
+        for each statement as it goes, skipping statements that are empty
+        once comments are removed.
+        """
+        try:
+            statements = split_statements(self._decode(sql))
+            for offset, statement in statements:
+                result = self.fingerprint(statement)
+                if result:
+                    yield offset, result
+        except SQLFingerprintError:
+            raise
+        except Exception as e:
+            raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
+
+    def digest(self, sql, bits=64, output='bytes'):
+        """Return a stable `bits`-bit digest (64 or 128) of the fingerprint.
+
+        ``output`` selects ``'bytes'`` (big-endian), ``'int'`` or ``'hex'``.
+        """
+        result = self.fingerprint(sql)
+        if fingerprint_digest is None:
+            _load_digest()
+        return format_digest(fingerprint_digest(result, bits), output)
+
+    def digest_many(self, queries, bits=64, workers=1, chunksize=DEFAULT_CHUNKSIZE):
+        """Return the digests of an iterable of queries as an ``array('Q')``.
+
+        Each 64-bit digest takes one element; a 128-bit digest takes two, the
+        high word first. Raises the first ``SQLFingerprintError`` met.
+        """
+        from array import array
+        if fingerprint_digest is None:
+            _load_digest()
+        digests = array('Q')
+        for result in self.fingerprint_many(queries, workers, chunksize):
+            if not isinstance(result, str):
+                raise result
+            value = int.from_bytes(fingerprint_digest(result, bits), 'big')
+            if bits == 128:
+                digests.append(value >> 64)
+            digests.append(value & 0xFFFFFFFFFFFFFFFF)
+        return digests
 
-            # Process tokens based on their location
-            in_select_clause = False
-            for i, token in enumerate(stmt.tokens):
-                if token.is_keyword and token.value.lower() == 'select':
-                    in_select_clause = True
-                elif in_select_clause and token.is_keyword and token.value.lower() in (
-                'from', 'where', 'group', 'having', 'order'):
-                    in_select_clause = False
+    def fingerprint_many(self, queries, workers=1, chunksize=DEFAULT_CHUNKSIZE):
+        """Fingerprint an iterable of queries, yielding results in input order.
 
-                stmt.tokens[i] = _process_token(token, in_select_clause)
+        With ``workers`` greater than 1 the queries are sent in chunks of
+        ``chunksize`` to a pool of that many processes; ``workers=None`` uses
+        one per CPU. Pool workers use this fingerprinter's engine and limits
+        but not its caches or instrumentation. A query that fails yields its
+        ``SQLFingerprintError`` instead of a fingerprint.
 
-            # Convert back to string
-            sql = str(stmt)
+        At most ``CHUNKS_PER_WORKER`` chunks per worker are read ahead of the
+        results taken, so memory stays bounded however long `queries` is and
+        however slowly the results are consumed.
+        """
+        if workers == 1:
+            for sql in queries:
+                yield self._fingerprint_or_error(sql)
+            return
 
-            # Normalize IN clauses with multiple values
-            sql = re.sub(r'in\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', 'in (?)', sql, flags=re.IGNORECASE)
+        from collections import deque
+        pending = deque()
+        window = self._window(workers)
+        with self._pool(workers) as pool:
+            for chunk in self._chunks(queries, chunksize):
+                pending.append(pool.apply_async(_fingerprint_chunk, (chunk,)))
+                if len(pending) >= window:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
 
-            # Ensure consistent spacing around parentheses for subqueries
-            sql = re.sub(r'\(\s+', '( ', sql)
-            sql = re.sub(r'\s+\)', ' )', sql)
+    def fingerprint_many_unordered(self, queries, workers=1, chunksize=DEFAULT_CHUNKSIZE):
+        """Like ``fingerprint_many`` but yield ``(index, result)`` pairs as
+        soon as they are ready, in no particular order.
+        """
+        if workers == 1:
+            for index, sql in enumerate(queries):
+                yield index, self._fingerprint_or_error(sql)
+            return
 
-            # Make sure all keywords are lowercase (especially for LIKE which seems to be missed)
-            for keyword in ['like', 'in', 'and', 'or', 'not', 'exists', 'is null']:
-                sql = re.sub(rf'\b{keyword}\b', keyword, sql, flags=re.IGNORECASE)
+        import queue
+        done = queue.SimpleQueue()
+        running = 0
+        window = self._window(workers)
+        with self._pool(workers) as pool:
+            start = 0
+            for chunk in self._chunks(queries, chunksize):
+                pool.apply_async(_fingerprint_indexed_chunk, (start, chunk),
+                                 callback=done.put, error_callback=done.put)
+                start += len(chunk)
+                running += 1
+                if running >= window:
+                    yield from _next_done(done)
+                    running -= 1
+            for _ in range(running):
+                yield from _next_done(done)
 
-            # Final whitespace cleanup
-            sql = re.sub(r'\s+', ' ', sql)
+    def _options(self):
+        """Return the settings pool workers create their fingerprinter with."""
+        return {'engine': self.engine, 'max_length': self.max_length, 'max_tokens': self.max_tokens,
+                'time_budget': self.time_budget, 'degraded_prefix': self.degraded_prefix,
+                'encoding': self.encoding}
 
-            # Remove backticks around identifiers
-            sql = re.sub(r'`([^`]+)`', r'\1', sql)
+    def _decode(self, sql):
+        if isinstance(sql, BINARY_TYPES):
+            return str(sql, self.encoding, 'replace')
+        return sql
+
+    def _picklable(self, sql):
+        # Memoryviews cannot be sent to other processes; decoding them here
+        # copies no more than converting them to bytes would.
+        return self._decode(sql) if isinstance(sql, memoryview) else sql
+
+    def _chunks(self, queries, chunksize):
+        from itertools import islice
+        queries = map(self._picklable, queries)
+        while True:
+            chunk = list(islice(queries, chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def _window(self, workers):
+        import os
+        return CHUNKS_PER_WORKER * (workers or os.cpu_count() or 1)
+
+    def _pool(self, workers):
+        import multiprocessing
+        return multiprocessing.Pool(workers, initializer=_init_worker, initargs=(self._options(),))
+
+    def _fingerprint_or_error(self, sql):
+        try:
+            return self.fingerprint(sql)
+        except SQLFingerprintError as e:
+            return e
+
+    def _fingerprint(self, sql, timer=None, params=None, parsed=None, walker=None):
+        if not _loaded:
+            _load()
+        if timer is not None:
+            timer.lap('cache')
+        try:
+            collapsed = collapse_bulk(sql, params)
+        except Exception as e:
+            raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
+        if timer is not None:
+            timer.lap('bulk')
+        if self.max_tokens is not None and exceeds_tokens(collapsed, self.max_tokens):
+            return self._degrade(sql, 'tokens', timer)
+        if collapsed is not sql:
+            result = self._normalize(collapsed, timer, params, walker=walker)
+            if MARKER not in result:
+                return result
+            if params is not None:
+                params.reset()
+        return self._normalize(sql, timer, params, parsed, walker)
+
+    def _degrade(self, sql, reason, timer):
+        result = degraded_fingerprint(sql, reason, self.degraded_prefix)
+        if timer is not None:
+            timer.deadline = None
+            timer.lap('degrade')
+        return result
+
+    def _normalize(self, sql, timer=None, params=None, parsed=None, walker=None):
+        if self.engine == 'fast':
+            if fast_fingerprint is None:
+                _load_lexer()
+            try:
+                result = fast_fingerprint(sql, params, None if walker is None else walker())
+            except Exception as e:
+                raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
+            if timer is not None:
+                timer.lap('lexer', result is not None)
+            if result is not None:
+                return result
+            if params is not None:
+                params.reset_scan()
+
+        return self._fingerprint_sqlparse(sql, timer, params, parsed)
+
+    def _fingerprint_sqlparse(self, sql, timer=None, params=None, parsed=None):
+        try:
+            # Lex and group the first statement the way sqlparse.format
+            # does, then apply its filters (case, comments, indentation) to
+            # the tree directly. Formatting to text and parsing that again
+            # would copy the statement and lex it twice for the same tree.
+            stack = formatter.build_filter_stack(sqlparse.engine.FilterStack(), _FORMAT_OPTIONS)
+            filters, stack.stmtprocess = stack.stmtprocess, []
+            if params is not None:
+                # Ahead of the case filters, so that it sees the source text.
+                stack.preprocess.insert(0, params)
+            if parsed is None:
+                stmt = next(stack.run(sql), None)
+            elif isinstance(parsed, sqlparse.sql.TokenList):
+                stmt = _copy_statement(parsed, stack.preprocess)
+            else:
+                stmt = _group_tokens(parsed, stack.preprocess)
+            if timer is not None:
+                timer.lap('parse', stmt is None)
+            if stmt is None:
+                return ""
+            for filter_ in filters:
+                filter_.process(stmt)
+            if timer is not None:
+                timer.lap('format')
+
+            # Replace literals with placeholders
+            sql = _render_statement(stmt, params)
+            if timer is not None:
+                timer.lap('render')
 
-            return sql.strip()
+            # Collapse IN lists, lowercase keywords the formatter misses
+            # (e.g. LIKE), normalize whitespace and remove backticks
+            result = postprocess(sql, params)
+            if timer is not None:
+                timer.lap('postprocess', True)
+            return result
 
         except Exception as e:
             raise SQLFingerprintError(f"Fingerprint failed: {str(e)}") from e
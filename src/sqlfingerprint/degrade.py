@@ -0,0 +1,68 @@
+"""Cheap fingerprints for inputs over a fingerprinter's limits.
+
+Formatting and parsing take time that grows with the input, and so can the
+regular expressions of the post-processing stage on adversarial text. When a
+statement is too long, has too many tokens or runs out of its time budget,
+``SQLFingerprinter`` returns ``degraded_fingerprint`` of it instead. This
+masks literals, drops comments, collapses whitespace and lists of
+placeholders and lowercases the text, in two linear scans: every pattern
+below is written so that it cannot fail after its first character, leaving
+nothing to backtrack over.
+
+The result is a ``DegradedFingerprint``, a ``str`` whose ``reason`` tells
+which limit was hit. It differs from the full fingerprint of the same query,
+so degraded and full fingerprints of one query do not group together.
+"""
+import itertools
+import re
+
+_MASK_RE = re.compile(r"""
+    (?P<space>(?:\s|--[^\r\n]*|/\*.*?(?:\*/|\Z))+)
+  | (?P<string>'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'?|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"?)
+  | (?P<number>(?<![\w.$:@])\d+(?:\.\d+)?(?:e[-+]?\d+)?)
+""", re.IGNORECASE | re.DOTALL | re.VERBOSE)
+_LIST_RE = re.compile(r'\(\s?\?(?:\s?,\s?\?)+\s?\)')
+
+# Tokens roughly as sqlparse's lexer counts them: comments, quoted strings
+# and names, numbers, words, whitespace runs and single punctuation
+# characters. Comments, strings and numbers are matched as in
+# ``core.shape_key``, so that queries sharing a shape key have as many tokens
+# and are on the same side of ``max_tokens``.
+_TOKEN_RE = re.compile(r"""
+    --[^\r\n]*|\#\ [^\r\n]*|/\*.*?(?:\*/|\Z)
+  | '(?:''|\\'|[^'])*'?|"(?:""|\\"|[^"])*"?|`(?:``|[^`])*`?
+  | \d+(?:\.\d+)?(?:e-?\d+)?(?![\w.])|\w+|\s+|.
+""", re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+
+class DegradedFingerprint(str):
+    """A fingerprint computed by ``degraded_fingerprint``."""
+
+    def __new__(cls, fingerprint, reason=None):
+        self = super().__new__(cls, fingerprint)
+        self.reason = reason
+        return self
+
+    def __repr__(self):
+        return f'DegradedFingerprint({str.__repr__(self)}, reason={self.reason!r})'
+
+
+def _mask(m):
+    return ' ' if m.lastgroup == 'space' else '?'
+
+
+def degraded_fingerprint(sql, reason=None, prefix=None):
+    """Return the degraded fingerprint of `sql`.
+
+    With `prefix` set only the first `prefix` characters are fingerprinted,
+    so that inputs sharing a long common start share a fingerprint.
+    """
+    if prefix is not None:
+        sql = sql[:prefix]
+    masked = _LIST_RE.sub('(?)', _MASK_RE.sub(_mask, sql))
+    return DegradedFingerprint(masked.strip().lower(), reason)
+
+
+def exceeds_tokens(sql, limit):
+    """Whether `sql` has more than `limit` tokens; stops counting past it."""
+    return next(itertools.islice(_TOKEN_RE.finditer(sql), limit, None), None) is not None
@@ -0,0 +1,30 @@
+"""Fixed-width digests of normalized queries.
+
+A digest is the BLAKE2b hash of the UTF-8 encoded fingerprint, personalized
+with ``PERSON`` and truncated to 64 or 128 bits. It does not depend on the
+platform or Python version. Changing ``PERSON`` or the hash changes every
+persisted key, so neither may change between releases.
+"""
+import hashlib
+
+PERSON = b'sqlfingerprint'
+DIGEST_BITS = (64, 128)
+OUTPUTS = ('bytes', 'int', 'hex')
+
+
+def fingerprint_digest(fingerprint, bits=64):
+    """Return the `bits`-bit digest of a fingerprint as big-endian bytes."""
+    if bits not in DIGEST_BITS:
+        raise ValueError(f"Unsupported digest size {bits!r}, expected one of {DIGEST_BITS}")
+    return hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=bits // 8, person=PERSON).digest()
+
+
+def format_digest(digest, output='bytes'):
+    """Convert a digest from `fingerprint_digest` to bytes, int or hex."""
+    if output == 'bytes':
+        return digest
+    if output == 'int':
+        return int.from_bytes(digest, 'big')
+    if output == 'hex':
+        return digest.hex()
+    raise ValueError(f"Unknown digest output {output!r}, expected one of {OUTPUTS}")
@@ -0,0 +1,261 @@
+"""Match incoming queries against a set of registered fingerprints.
+
+Fingerprinting only lowercases words, drops ``TRUE`` and ``FALSE`` along with
+the other literals and leaves every other word in place, so the sequence of
+words of a query (outside strings and comments) is the sequence of words of
+its fingerprint. ``FingerprintIndex`` keeps the word sequences of the
+registered fingerprints in a trie. With the fast engine the trie is walked
+by the lexer itself as it fingerprints the query: the scan stops at the first
+word no registered fingerprint has in that position, which rejects most
+unknown queries after a fraction of the work, and a query that gets through
+is decided by looking up the fingerprint the same scan produced. Other
+engines walk the trie in a scan of their own before fingerprinting.
+
+Words the scan cannot vouch for (words starting with a digit, quoted names
+that touch a word, NULL, which a collapsed bulk list drops) end the walk, and
+the query is decided by its fingerprint alone.
+"""
+import pickle
+import re
+
+from .core import SQLFingerprinter
+from .lexer import _TOKEN_RE
+
+FORMAT_VERSION = 1
+
+_DROPPED_WORDS = frozenset(('true', 'false'))
+_PLAIN_NAME_RE = re.compile(r'`[\w\s]+`')
+_WORD_CHAR_RE = re.compile(r'\w')
+_NO_WORDS = ()
+
+
+class _NoMatch(BaseException):
+    """Raised by a trie walk at a word no registered fingerprint has there.
+
+    It is a BaseException so that the fingerprinter lets it through like
+    its own time budget exception.
+    """
+
+
+def _token_words(kind, m):
+    """Return the words a word, parameter or name token puts in the
+    fingerprint, or None if the scan cannot tell.
+    """
+    if kind == 'word':
+        word = m.group().lower()
+        if word[0].isdigit() or word == 'null':
+            return None
+        return _NO_WORDS if word in _DROPPED_WORDS else (word,)
+    if kind == 'param':
+        return (m.group().lower(),)
+    # Unquoting a name that touches a word merges the two.
+    sql = m.string
+    start, end = m.span()
+    if (not _PLAIN_NAME_RE.fullmatch(m.group())
+            or start and _WORD_CHAR_RE.match(sql, start - 1)
+            or _WORD_CHAR_RE.match(sql, end)):
+        return None
+    words = m.group()[1:-1].lower().split()
+    for word in words:
+        if word[0].isdigit() or word == 'null':
+            return None
+    return [word for word in words if word not in _DROPPED_WORDS]
+
+
+def _words(sql):
+    """Yield the lowercased words of `sql` that appear in its fingerprint,
+    then None if the scan bailed out.
+    """
+    if not sql.isascii():
+        yield None
+        return
+    for m in _TOKEN_RE.finditer(sql):
+        kind = m.lastgroup
+        if kind == 'word' or kind == 'param' or kind == 'name':
+            words = _token_words(kind, m)
+            if words is None:
+                yield None
+                return
+            yield from words
+        elif kind == 'semi':
+            return
+        elif kind == 'bad' or kind == 'unknown':
+            yield None
+            return
+
+
+class FingerprintIndex:
+    """Set of fingerprints, each with an optional value, that queries are
+    matched against.
+
+    ``fingerprinter`` fingerprints queries added with ``add_query`` and the
+    queries that reach the exact lookup; it must not use ``degraded_prefix``,
+    whose fingerprints do not keep all the words of the query.
+    """
+
+    def __init__(self, fingerprinter=None):
+        self.fingerprinter = fingerprinter if fingerprinter is not None else SQLFingerprinter(engine='fast')
+        if self.fingerprinter.degraded_prefix is not None:
+            raise ValueError("FingerprintIndex does not support fingerprinters with degraded_prefix")
+        self._values = {}
+        # The trie: (node, word) -> child node. Node 0 is the root; nodes
+        # where a registered word sequence ends are in _terminals.
+        self._edges = {}
+        self._terminals = set()
+        self._nodes = 1
+
+    @classmethod
+    def from_fingerprints(cls, fingerprints, fingerprinter=None):
+        """Build an index of fingerprints, or of (fingerprint, value) pairs
+        if `fingerprints` is a mapping.
+        """
+        index = cls(fingerprinter)
+        items = fingerprints.items() if hasattr(fingerprints, 'items') else ((f, None) for f in fingerprints)
+        for fingerprint, value in items:
+            index.add(fingerprint, value)
+        return index
+
+    @classmethod
+    def from_queries(cls, queries, fingerprinter=None):
+        """Build an index of the fingerprints of example queries."""
+        index = cls(fingerprinter)
+        for sql in queries:
+            index.add_query(sql)
+        return index
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self._values
+
+    def add(self, fingerprint, value=None):
+        """Register a fingerprint with an optional value."""
+        self._values[fingerprint] = value
+        node = 0
+        edges = self._edges
+        for word in _words(fingerprint):
+            if word is None:
+                # Queries with this fingerprint make the scan bail out too.
+                return
+            child = edges.get((node, word))
+            if child is None:
+                child = edges[node, word] = self._nodes
+                self._nodes += 1
+            node = child
+        self._terminals.add(node)
+
+    def add_query(self, sql, value=None):
+        """Register the fingerprint of `sql`; returns the fingerprint."""
+        fingerprint = self.fingerprinter.fingerprint(sql)
+        self.add(fingerprint, value)
+        return fingerprint
+
+    def match(self, sql):
+        """Return the registered fingerprint `sql` matches, or None.
+
+        Raises ``SQLFingerprintError`` if `sql` has to be fingerprinted and
+        cannot be.
+        """
+        fingerprinter = self.fingerprinter
+        sql = fingerprinter._decode(sql)
+        if isinstance(sql, str):
+            if fingerprinter.engine == 'fast':
+                try:
+                    fingerprint = fingerprinter._fingerprint_text(sql, walker=self._walker)
+                except _NoMatch:
+                    return None
+                return fingerprint if fingerprint in self._values else None
+            node = 0
+            edges = self._edges
+            for word in _words(sql):
+                if word is None:
+                    break
+                node = edges.get((node, word))
+                if node is None:
+                    return None
+            else:
+                if node not in self._terminals:
+                    return None
+        fingerprint = fingerprinter.fingerprint(sql)
+        return fingerprint if fingerprint in self._values else None
+
+    def _walker(self):
+        """Return the ``walk`` hook of one fast lexer scan: it follows the
+        trie along the words scanned and raises _NoMatch where it has no edge.
+        """
+        edges = self._edges
+        node = 0
+
+        def walk(kind, m):
+            nonlocal node
+            if node is None:
+                return
+            if kind == 'word':
+                # The common case, inlined from _token_words.
+                word = m.group().lower()
+                if word in _DROPPED_WORDS:
+                    return
+                if word[0].isdigit() or word == 'null':
+                    node = None
+                    return
+                node = edges.get((node, word))
+                if node is None:
+                    raise _NoMatch
+                return
+            words = _token_words(kind, m)
+            if words is None:
+                node = None
+                return
+            for word in words:
+                node = edges.get((node, word))
+                if node is None:
+                    raise _NoMatch
+        return walk
+
+    def get(self, sql, default=None):
+        """Return the value registered with the fingerprint `sql` matches, or
+        `default`.
+        """
+        fingerprint = self.match(sql)
+        return default if fingerprint is None else self._values[fingerprint]
+
+    def __getstate__(self):
+        return {
+            'format': FORMAT_VERSION,
+            'options': self.fingerprinter._options(),
+            'values': self._values,
+            'edges': self._edges,
+            'terminals': self._terminals,
+            'nodes': self._nodes,
+        }
+
+    def __setstate__(self, state):
+        if state['format'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported FingerprintIndex format {state['format']!r}")
+        self.fingerprinter = SQLFingerprinter(**state['options'])
+        self._values = state['values']
+        self._edges = state['edges']
+        self._terminals = state['terminals']
+        self._nodes = state['nodes']
+
+    def save(self, path):
+        """Write the index to `path`."""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, fingerprinter=None):
+        """Read an index written by ``save``. Only load trusted files: they
+        are pickles.
+
+        The index fingerprints with a fingerprinter like the one it was
+        saved with, unless `fingerprinter` is given.
+        """
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if not isinstance(index, cls):
+            raise ValueError(f"{path!r} does not hold a {cls.__name__}")
+        if fingerprinter is not None:
+            index.fingerprinter = fingerprinter
+        return index
@@ -0,0 +1,113 @@
+"""Optional per-stage timing of SQLFingerprinter.
+
+An ``Instrumentation`` passed to ``SQLFingerprinter(instrumentation=...)``
+times every ``sample_every``-th call to ``fingerprint`` and splits the time
+into the stages below. The totals, a histogram of input sizes and the slowest
+inputs seen are available as a ``stats()`` snapshot; ``hook`` receives a
+``Sample`` per timed call, e.g. to feed a metrics system. Calls that are not
+sampled, and fingerprinters without instrumentation, skip all of it.
+
+Stages:
+
+* ``cache``: cache lookups, shape keys and storing results;
+* ``bulk``: collapsing bulk IN lists and VALUES rows;
+* ``lexer``: the fast engine;
+* ``parse``: lexing and grouping the statement with sqlparse;
+* ``format``: sqlparse's case, comment and indentation filters;
+* ``render``: replacing literals in the parsed statement;
+* ``postprocess``: the regex clean-up of the rendered text;
+* ``degrade``: computing a degraded fingerprint (see ``degrade.py``).
+"""
+import bisect
+import heapq
+import itertools
+import threading
+from collections import namedtuple
+
+STAGES = ('cache', 'bulk', 'lexer', 'format', 'parse', 'render', 'postprocess', 'degrade')
+# Upper bounds, in characters, of the input size histogram buckets. Larger
+# inputs are counted under infinity.
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+StageStats = namedtuple('StageStats', 'calls seconds')
+SlowInput = namedtuple('SlowInput', 'seconds size sql')
+Sample = namedtuple('Sample', 'sql seconds stages error')
+InstrumentationStats = namedtuple('InstrumentationStats', 'calls errors seconds stages sizes slowest')
+
+
+class Instrumentation:
+    """Thread-safe collector of fingerprinting timings.
+
+    Only every ``sample_every``-th call is timed. The ``slowest`` slowest
+    sampled inputs are kept in full. ``hook``, if given, is called with a
+    ``Sample`` after each timed call, outside of any lock; it must not raise.
+    """
+
+    def __init__(self, sample_every=1, slowest=10, hook=None, size_buckets=SIZE_BUCKETS):
+        if sample_every <= 0:
+            raise ValueError("sample_every must be positive")
+        if slowest < 0:
+            raise ValueError("slowest must not be negative")
+        self.sample_every = sample_every
+        self.slowest = slowest
+        self.hook = hook
+        self.size_buckets = tuple(size_buckets)
+        self._ticks = itertools.count()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._calls = 0
+        self._errors = 0
+        self._seconds = 0.0
+        self._stages = {}
+        self._sizes = [0] * (len(self.size_buckets) + 1)
+        self._slowest = []
+
+    def sample(self):
+        """Return whether the current call is to be timed."""
+        return self.sample_every == 1 or next(self._ticks) % self.sample_every == 0
+
+    def record(self, sql, timer, error=None):
+        """Add a finished call timed by `timer` to the statistics."""
+        timer.lap('cache')
+        seconds = timer.last - timer.start
+        size = len(sql) if hasattr(sql, '__len__') else 0
+        with self._lock:
+            self._calls += 1
+            self._seconds += seconds
+            if error is not None:
+                self._errors += 1
+            for stage, elapsed in timer.stages.items():
+                calls, total = self._stages.get(stage, (0, 0.0))
+                self._stages[stage] = (calls + 1, total + elapsed)
+            self._sizes[bisect.bisect_left(self.size_buckets, size)] += 1
+            if self.slowest:
+                # The call number breaks ties so that inputs are never compared.
+                entry = (seconds, self._calls, SlowInput(seconds, size, sql))
+                if len(self._slowest) < self.slowest:
+                    heapq.heappush(self._slowest, entry)
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+        if self.hook is not None:
+            self.hook(Sample(sql, seconds, timer.stages, error))
+
+    def clear(self):
+        """Reset the statistics."""
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        """Return an InstrumentationStats snapshot.
+
+        ``stages`` maps each stage that ran to a ``StageStats`` of the number
+        of timed calls it ran in and its total seconds. ``sizes`` maps each
+        bucket's upper bound to its count. ``slowest`` lists ``SlowInput``
+        tuples, slowest first.
+        """
+        with self._lock:
+            stages = {stage: StageStats(*self._stages[stage]) for stage in STAGES if stage in self._stages}
+            bounds = self.size_buckets + (float('inf'),)
+            return InstrumentationStats(self._calls, self._errors, self._seconds, stages,
+                                        dict(zip(bounds, self._sizes)),
+                                        [slow for _, _, slow in sorted(self._slowest, reverse=True)])
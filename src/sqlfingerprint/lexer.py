@@ -0,0 +1,471 @@
+"""Single-pass fingerprint engine.
+
+``fast_fingerprint`` produces the same output as the sqlparse pipeline in
+``core.py`` without formatting, parsing or walking a token tree: it lexes the
+input once with the token rules sqlparse itself uses and applies comment
+stripping, case folding, literal replacement, IN-list collapsing and
+whitespace normalization while it scans.
+
+Input whose rendering depends on sqlparse's grouping in ways the scanner does
+not model makes it return ``None``; the caller then falls back to sqlparse.
+"""
+import re
+
+from sqlparse import tokens as T
+from sqlparse.lexer import Lexer
+
+from .postprocess import POSTPROCESS_KEYWORDS, postprocess
+
+# Alternatives are ordered like sqlparse.keywords.SQL_REGEX so that
+# overlapping rules (e.g. ``-1`` as a number vs. ``-`` as an operator)
+# resolve the same way.  Anything the scanner does not support ends up in
+# ``bad``.
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--(?!\+)[^\r\n]*|/\*(?!\+).*?\*/)
+  | (?P<bad>--|/\*|:=)
+  | (?P<cast>::)
+  | (?P<star>\*)
+  | (?P<name>`[^`]+`)
+  | (?P<qmark>\?)
+  | (?P<param>%(?:\(\w+\))?s|(?<!\w):\w+|(?<!\w)\$\d+)
+  | (?P<number>-?0x[\da-f]+
+      | -?\d+(?:\.\d+)?e-?\d+
+      | (?![_a-z])-?(?:\d+\.\d*|\.\d+)(?![_a-z])
+      | (?![_a-z])-?\d+(?![_a-z]))
+  | (?P<string>'(?:''|\\'|[^'])*'|"(?:""|\\"|[^"])*")
+  | (?P<word>\w+)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<comma>,)
+  | (?P<semi>;)
+  | (?P<punct>[.:])
+  | (?P<op>[<>=~!]+|[+/%^&|-]+)
+  | (?P<unknown>.)
+""", re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+_NAME_BEFORE_DOT = re.compile(r'\s*\.(?!\d)')
+
+# Keywords sqlparse's reindent filter puts on a new line; see
+# ReindentFilter._next_token, which matches them with re.search.
+_SPLIT_RE = re.compile(
+    r'FROM|STRAIGHT_JOIN$|JOIN$|AND|OR|GROUP BY|ORDER BY|UNION|VALUES|SET'
+    r'|BETWEEN|EXCEPT|HAVING|LIMIT')
+# Keywords reindent also breaks before, or that start a multi-word keyword
+# token which does.
+_BREAK_BEFORE = frozenset((
+    'where', 'when', 'else', 'end', 'left', 'right', 'full', 'inner',
+    'outer', 'cross', 'natural', 'straight', 'group', 'order', 'union',
+))
+_ALWAYS_KEYWORDS = frozenset(('case', 'in', 'values', 'using', 'from', 'as'))
+# Words whose sqlparse token rules the scanner does not reproduce.
+_UNSUPPORTED_WORDS = frozenset(('regexp', 'zone', 'go', 'precision'))
+_KEEP_CASE_WORDS = frozenset(('ilike', 'rlike'))
+_DML_DDL = (T.Keyword.DML, T.Keyword.DDL)
+_COMPARISON_RE = re.compile(r'[<>=!~]+$')
+
+_keyword_types = {}
+
+
+def _keyword_type(word):
+    """Return the sqlparse token type of a bare word."""
+    try:
+        return _keyword_types[word]
+    except KeyError:
+        ttype = Lexer.get_default_instance().is_keyword(word)[0]
+        _keyword_types[word] = ttype
+        return ttype
+
+
+def _opens_item(kind, text, ttype, forced_name):
+    """Classify the token after a comma for sqlparse's comma-list grouping.
+
+    Returns True if it starts a valid list item, False if it does not and
+    None if that depends on the token after it.
+    """
+    if kind == 'word':
+        if forced_name or ttype is T.Name:
+            return True
+        if ttype is T.Name.Builtin:
+            return None
+        return ttype is T.Keyword or ttype is T.Keyword.Order
+    if kind == 'number':
+        return None if _is_hex(text) else True
+    if kind == 'open':
+        return None
+    return kind in ('string', 'qmark', 'param', 'star', 'name')
+
+
+def _starts_clause(word, ttype):
+    """Whether reindent starts a new line in front of keyword `word`."""
+    return ttype in T.Keyword and (
+        ttype in _DML_DDL or _SPLIT_RE.search(word.upper()) is not None
+        or word.lower() in _BREAK_BEFORE)
+
+
+def _operator(kind, text, ttype):
+    """Return 'comparison' or 'operation' if the token is such an operator."""
+    if kind == 'star':
+        return 'operation'
+    if kind == 'op':
+        return 'comparison' if _COMPARISON_RE.match(text) else 'operation'
+    if ttype is T.Operator.Comparison:
+        return 'comparison'
+    return None
+
+
+def _operand(kind, lower, ttype):
+    """Return what sqlparse accepts the token as an operand of.
+
+    True means any operator, otherwise the value is the kind of operator
+    from `_operator` or None.
+    """
+    if kind in ('number', 'string', 'qmark', 'param', 'name', 'open', 'close'):
+        return True
+    if kind == 'word':
+        if ttype is T.Name:
+            return True
+        if lower == 'null':
+            return 'comparison'
+        if lower in ('current_date', 'current_time', 'current_timestamp'):
+            return 'operation'
+    return None
+
+
+def _is_operand(operand, operator):
+    return operand is True or operand == operator
+
+
+def _is_hex(number):
+    return number[:2].lower() == '0x' or number[:3].lower() == '-0x'
+
+
+def fast_fingerprint(sql, params=None, walk=None):
+    """Fingerprint `sql` in a single scan.
+
+    Returns None if the input uses constructs that only the sqlparse engine
+    renders correctly. The replaced literals are added to `params`, a
+    ``params._Collector``, if given. `walk`, if given, is called with the
+    kind and match of every word, parameter and quoted name as it is
+    scanned, and may raise to stop the scan (see ``index.py``).
+    """
+    if not sql.isascii():
+        return None
+
+    out = []
+    # One entry per open parenthesis:
+    # [index of its separator in out, only "?" and commas so far,
+    #  number of "?", expecting a "?" next, grouped with the word before it,
+    #  opened after an operator, comma in front of it, holds a statement]
+    groups = []
+    depth = 0
+    prev = None
+    prev_word = ''
+    # What the last token is as the left operand of an operator, and whether
+    # the last token is an operator with a valid left operand.
+    prev_operand = False
+    prev_operation = False
+    # The last word groups with a following parenthesis (function call,
+    # OVER clause, CTE body).
+    prev_call = False
+    # The last token can end an item of a sqlparse comma list.
+    prev_item = False
+    # The last token starts a typed literal such as DATE '2020-01-01'.
+    prev_typed = False
+    had_ws = False
+    inner_comment = False
+    in_select = False
+    values_state = None
+    # How the last comma is spaced ('list', 'source', 'values' or 'tuples'),
+    # the index of the separator in front of it and whether the source had
+    # whitespace there.
+    comma_mode = None
+    comma_index = 0
+    comma_ws = ''
+    # A comma whose spacing depends on the token after the next one:
+    # (index of the separator before it, index of the one after it,
+    # source separators, what the next item is).
+    pending = None
+
+    for m in _TOKEN_RE.finditer(sql):
+        kind = m.lastgroup
+        if kind == 'ws':
+            had_ws = True
+            continue
+        if kind == 'comment':
+            # sqlparse groups the statement before it strips comments, so a
+            # comment between two tokens can change how they are grouped.
+            if prev == 'close':
+                return None
+            had_ws = True
+            inner_comment = bool(out)
+            continue
+        if kind == 'bad' or kind == 'unknown':
+            return None
+
+        text = m.group()
+        source_sep = ' ' if had_ws else ''
+        had_ws = False
+        if walk is not None and (kind == 'word' or kind == 'param' or kind == 'name'):
+            walk(kind, m)
+
+        lower = ttype = None
+        forced_name = call = False
+        if kind == 'word':
+            lower = text.lower()
+            if lower in _UNSUPPORTED_WORDS:
+                return None
+            end = m.end()
+            if prev == 'dot':
+                ttype = T.Name
+                forced_name = True
+                call = sql.startswith('(', end)
+            elif lower in _ALWAYS_KEYWORDS:
+                ttype = T.Keyword
+            elif text[0].isalpha() and sql.startswith('(', end):
+                ttype = T.Name
+                forced_name = call = True
+            elif text[0].isalpha() and _NAME_BEFORE_DOT.match(sql, end):
+                ttype = T.Name
+                forced_name = True
+            elif lower in _KEEP_CASE_WORDS or lower == 'like':
+                ttype = T.Operator.Comparison
+            else:
+                ttype = _keyword_type(text)
+
+        if inner_comment:
+            # Comments are harmless in front of a clause keyword since that
+            # never groups with the token before it.
+            if kind != 'semi' and not (kind == 'word' and _starts_clause(text, ttype)):
+                return None
+            inner_comment = False
+
+        if pending is not None:
+            before, after, ws_before, ws_after, paren = pending
+            pending = None
+            alias = kind == 'word' and ttype is T.Name and not forced_name
+            grouped = False
+            if paren in ('comparison', 'operation'):
+                grouped = _is_operand(_operand(kind, lower, ttype), paren)
+            elif kind == 'cast' or lower == 'as':
+                grouped = True
+            elif paren == 'paren':
+                operator = _operator(kind, text, ttype)
+                if operator:
+                    # Decided by the operand after the operator.
+                    pending = (before, after, ws_before, ws_after, operator)
+                grouped = alias
+            elif paren == 'hex':
+                grouped = alias
+            if not grouped and pending is None:
+                out[before] = ws_before
+                out[after] = ws_after
+
+        opens_item = True
+        if kind == 'close' or kind == 'comma':
+            if prev == 'comma':
+                return None
+            sep = ''
+        elif prev == 'open':
+            sep = ''
+        elif prev == 'comma':
+            if comma_mode == 'list':
+                opens_item = _opens_item(kind, text, ttype, forced_name)
+                if opens_item is False:
+                    out[comma_index] = comma_ws
+                    sep = source_sep
+                else:
+                    sep = ' '
+            elif comma_mode == 'tuples':
+                sep = ' '
+            else:
+                sep = source_sep
+        elif out:
+            sep = source_sep
+        else:
+            sep = ''
+        if sep and (kind == 'punct' and text == '.' or prev == 'dot'):
+            return None
+
+        emits_qmark = False
+        item = False
+        typed = False
+        if kind == 'word':
+            if ttype in T.Keyword:
+                if ttype in _DML_DDL:
+                    if lower == 'create':
+                        # Table definitions are grouped differently.
+                        return None
+                    if prev == 'open':
+                        # Reindent starts a new line in front of a
+                        # parenthesis that holds a statement, except
+                        # within the rows of a VALUES clause.
+                        group = groups[-1]
+                        if group[0] and values_state != 'open':
+                            out[group[0]] = ' '
+                            group[7] = True
+                    elif out and not sep:
+                        return None
+                elif _starts_clause(text, ttype):
+                    if prev == 'open':
+                        sep = ' '
+                    elif out and not sep:
+                        return None
+
+                if depth == 0:
+                    if lower == 'select':
+                        in_select = True
+                    elif lower == 'from':
+                        in_select = False
+                    elif lower == 'having' and in_select:
+                        return None
+                if lower == 'values':
+                    if depth or values_state is not None:
+                        return None
+                    values_state = 'open'
+                elif depth == 0 and values_state == 'open':
+                    values_state = 'closed'
+
+                item = ttype is T.Keyword or ttype is T.Keyword.Order
+                typed = lower == 'timestamp'
+                if lower in ('true', 'false') and ttype is T.Keyword:
+                    text = '?'
+                    emits_qmark = True
+                    if params is not None:
+                        params.add(m.start(), m.group(), 'boolean')
+                else:
+                    text = lower
+            else:
+                if depth == 0 and values_state == 'open':
+                    values_state = 'closed'
+                if ttype is T.Name:
+                    item = True
+                    text = lower
+                elif ttype is T.Name.Builtin:
+                    item = prev == 'cast' or prev_word == 'as'
+                    typed = True
+                    if lower in ('true', 'false'):
+                        text = '?'
+                        emits_qmark = True
+                        if params is not None:
+                            params.add(m.start(), m.group(), 'boolean')
+                elif lower in POSTPROCESS_KEYWORDS:
+                    text = lower
+            prev_word = lower
+            prev_call = ttype is T.Name or lower == 'over' or lower == 'as'
+        elif kind == 'number':
+            if params is not None:
+                params.add(m.start(), text)
+            item = not _is_hex(text)
+            text = '?'
+            emits_qmark = True
+        elif kind == 'string':
+            item = not prev_typed
+            if in_select:
+                if '?' in text or '`' in text:
+                    return None
+                # Quoted text cannot hold IN lists or backticks here and
+                # starts and ends with a quote, so stripping is a no-op.
+                text = postprocess(text)
+            else:
+                if params is not None:
+                    params.add(m.start(), text, 'string')
+                text = '?'
+                emits_qmark = True
+        elif kind == 'qmark':
+            item = emits_qmark = True
+        elif kind == 'param' or kind == 'star':
+            if kind == 'param' and sql[m.end():m.end() + 1].isalnum():
+                return None
+            item = True
+        elif kind == 'name':
+            if '?' in text:
+                return None
+            item = True
+            text = re.sub(r'\s+', ' ', text[1:-1].lower())
+        elif kind == 'punct':
+            if text == '.':
+                kind = 'dot'
+        elif kind == 'semi':
+            if depth:
+                return None
+
+        if groups and kind != 'close':
+            group = groups[-1]
+            if group[1]:
+                if emits_qmark and group[3]:
+                    group[2] += 1
+                    group[3] = False
+                elif kind == 'comma' and not group[3]:
+                    group[3] = True
+                else:
+                    group[1] = False
+
+        if kind == 'open':
+            if values_state == 'closed' and depth == 0:
+                return None
+            comma = None
+            if opens_item is None:
+                comma = (comma_index, comma_ws, source_sep)
+            groups.append([len(out), True, 0, True,
+                           prev == 'word' and prev_call, prev_operation,
+                           comma, False])
+            out.append(sep)
+            out.append('(')
+            depth += 1
+        elif kind == 'close':
+            if not depth:
+                return None
+            mark, pure, count, expect_qmark, call, after_op, comma, dml = groups.pop()
+            depth -= 1
+            if (pure and count > 1 and not expect_qmark
+                    and ''.join(out[max(0, mark - 2):mark]).lower().endswith('in')):
+                del out[mark:]
+                out.append(' (?)')
+                if params is not None:
+                    params.collapsed = True
+            else:
+                out.append(')')
+                if comma is not None:
+                    pending = (comma[0], mark, comma[1],
+                               ' ' if dml else comma[2], 'paren')
+            if groups:
+                groups[-1][1] = False
+            item = call or after_op
+        elif kind == 'comma':
+            if values_state == 'open':
+                comma_mode = 'values' if depth else 'tuples'
+                out.append('')
+            elif prev_item:
+                comma_mode = 'list'
+                out.append('')
+            else:
+                comma_mode = 'source'
+                out.append(source_sep)
+            comma_index = len(out) - 1
+            comma_ws = source_sep
+            out.append(',')
+        else:
+            if opens_item is None:
+                pending = (comma_index, len(out), comma_ws, source_sep,
+                           'hex' if kind == 'number' else 'word')
+                out.append(sep)
+            elif sep:
+                out.append(sep)
+            out.append(text)
+            if kind == 'semi':
+                break
+        operator = _operator(kind, text, ttype)
+        prev_operation = bool(operator) and _is_operand(prev_operand, operator)
+        prev_operand = _operand(kind, lower, ttype)
+        prev = kind
+        prev_item = item
+        prev_typed = typed
+
+    if depth:
+        return None
+    if pending is not None:
+        before, after, ws_before, ws_after, _ = pending
+        out[before] = ws_before
+        out[after] = ws_after
+    return ''.join(out)
@@ -0,0 +1,158 @@
+"""Literal values replaced while fingerprinting.
+
+``SQLFingerprinter.fingerprint_params`` returns a ``ParameterizedFingerprint``
+holding the fingerprint and the literals it replaced with ``?``, e.g. to keep
+sample values or replay a query with EXPLAIN. The literals are collected by
+the scans that compute the fingerprint, so no second parse is needed: the
+bulk list scan, the fast lexer, and for the sqlparse engine a filter on
+sqlparse's token stream plus the literal rewrite.
+
+Positions are offsets in the query as given (after decoding). Bulk lists are
+collapsed before the rest of the query is scanned, so ``_Collector`` maps
+offsets in the collapsed text back to the original.
+"""
+from collections import namedtuple
+from operator import itemgetter
+
+from sqlparse import tokens as T
+
+from .degrade import DegradedFingerprint
+
+# A replaced literal: its SQL text, its type ('integer', 'float', 'hex',
+# 'string', 'boolean' or 'literal') and the offset of its first character.
+Parameter = namedtuple('Parameter', 'value type position')
+_BOOLEANS = ('true', 'false')
+
+
+class ParameterizedFingerprint:
+    """A fingerprint with the literals replaced in it.
+
+    ``parameters`` lists a ``Parameter`` per replaced literal in query order,
+    or is None if the fingerprint is degraded. There can be more parameters
+    than ``?`` in the fingerprint: ``collapsed`` tells whether an IN list or
+    multi-row VALUES was collapsed to a single ``?``, and placeholders already
+    in the query are not parameters.
+    """
+
+    __slots__ = ('fingerprint', 'parameters', 'collapsed')
+
+    def __init__(self, fingerprint, parameters, collapsed=False):
+        self.fingerprint = fingerprint
+        self.parameters = parameters
+        self.collapsed = collapsed
+
+    def __repr__(self):
+        return (f'ParameterizedFingerprint({self.fingerprint!r}, parameters={self.parameters!r}, '
+                f'collapsed={self.collapsed!r})')
+
+    def __eq__(self, other):
+        if not isinstance(other, ParameterizedFingerprint):
+            return NotImplemented
+        return (self.fingerprint, self.parameters, self.collapsed) == \
+            (other.fingerprint, other.parameters, other.collapsed)
+
+    __hash__ = None
+
+
+def number_type(text):
+    """Return the parameter type of a numeric literal, as sqlparse lexes it."""
+    lower = text.lower()
+    if '0x' in lower:
+        return 'hex'
+    if '.' in lower or 'e' in lower:
+        return 'float'
+    return 'integer'
+
+
+def _element_type(value):
+    """Return the parameter type of a bulk list element."""
+    if value[0] == "'":
+        return 'string'
+    if value.lower() in _BOOLEANS:
+        return 'boolean'
+    return number_type(value)
+
+
+def token_type(ttype):
+    """Return the parameter type of a replaced sqlparse token."""
+    if ttype in T.Number.Hexadecimal:
+        return 'hex'
+    if ttype in T.Number.Float:
+        return 'float'
+    if ttype in T.Number.Integer:
+        return 'integer'
+    if ttype in T.String:
+        return 'string'
+    if ttype in T.Literal:
+        return 'literal'
+    return 'boolean'
+
+
+class _Collector:
+    """Literals gathered while one query is fingerprinted.
+
+    ``literals`` holds ``(position, value, type)`` in the scanned text;
+    ``spans`` holds ``(start, end, length, items)`` per bulk list replaced by
+    `length` characters, with its items at their original positions;
+    ``collapsed`` is set when the scan collapses an IN list; ``tokens`` is
+    filled by ``process`` as sqlparse lexes the scanned text.
+    """
+
+    __slots__ = ('literals', 'spans', 'collapsed', 'tokens')
+
+    def __init__(self):
+        self.literals = []
+        self.spans = []
+        self.collapsed = False
+        self.tokens = []
+
+    def reset(self):
+        """Forget everything, e.g. before scanning the uncollapsed text."""
+        self.spans = []
+        self.reset_scan()
+
+    def reset_scan(self):
+        """Forget what the last scan found but keep the bulk lists."""
+        self.literals = []
+        self.collapsed = False
+        self.tokens = []
+
+    def add(self, position, value, type_=None):
+        """Record a replaced literal; numbers may leave the type out."""
+        self.literals.append((position, value, type_ or number_type(value)))
+
+    def add_span(self, start, end, length, items):
+        self.spans.append((start, end, length, [
+            Parameter(value, _element_type(value), position) for position, value in items]))
+
+    def process(self, stream):
+        """sqlparse preprocess filter recording every literal with its offset;
+        ``_render_statement`` consumes them in the same order.
+        """
+        position = 0
+        tokens = self.tokens
+        for ttype, value in stream:
+            if ttype in T.Literal or (
+                    (ttype is T.Keyword or ttype is T.Name.Builtin) and value.lower() in _BOOLEANS):
+                tokens.append((position, value, ttype))
+            position += len(value)
+            yield ttype, value
+
+    def result(self, fingerprint):
+        if isinstance(fingerprint, DegradedFingerprint):
+            return ParameterizedFingerprint(fingerprint, None)
+        spans = self.spans
+        parameters = [item for span in spans for item in span[3]]
+        i = shift = 0
+        for position, value, type_ in self.literals:
+            # Skip the bulk lists before this literal; a literal within one's
+            # replacement text stands for its items, which are listed already.
+            while i < len(spans) and position >= spans[i][0] - shift + spans[i][2]:
+                shift += spans[i][1] - spans[i][0] - spans[i][2]
+                i += 1
+            if i < len(spans) and position >= spans[i][0] - shift:
+                continue
+            parameters.append(Parameter(value, type_, position + shift))
+        if spans:
+            parameters.sort(key=itemgetter(2))
+        return ParameterizedFingerprint(fingerprint, parameters, self.collapsed or bool(spans))
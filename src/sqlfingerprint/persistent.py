@@ -0,0 +1,225 @@
+"""Fingerprint cache persisted in an SQLite database.
+
+``PersistentCache`` can be passed as the ``cache`` of a ``SQLFingerprinter``
+like a ``FingerprintCache``. Entries survive restarts and are shared by every
+process on the host that opens the same file: the database runs in WAL mode,
+so readers never wait for the writer, and writers wait up to ``timeout``
+seconds for each other. The file must be on a local file system.
+
+Rows are keyed by a BLAKE2b hash of the rules version, the options of the
+fingerprinter using the cache (its engine and limits) and the raw SQL. Rows
+written under another version or other options are never served but are not
+dropped either, so processes running an old and a new release side by side
+each keep their own entries; rows no longer used age out through eviction.
+
+Hot entries are also kept in an in-memory ``FingerprintCache`` in front of
+the database. Recently used entries are tracked with a timestamp that hits
+update in batches, and the least recently used rows are evicted in batches
+once the table holds more than ``max_entries`` rows, so the table may exceed
+that bound by up to a tenth between checks.
+
+A database still locked by another writer after ``timeout`` seconds makes a
+lookup count as a miss and a store be skipped, so that fingerprinting goes
+on without the cache rather than failing.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+from .cache import CacheStats, FingerprintCache
+
+_KEY_PERSON = b'sqlfp-cache'
+# Number of hits whose timestamps are collected before being written.
+_TOUCH_BATCH = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    key BLOB PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    reason TEXT,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fingerprints_used ON fingerprints (used);
+"""
+
+
+def rules_version():
+    """Return the default version stamp: the fingerprint rules version and
+    the sqlparse version, since both decide what a fingerprint looks like.
+    """
+    import sqlparse
+
+    from .core import FINGERPRINT_VERSION
+    return f'{FINGERPRINT_VERSION}:{sqlparse.__version__}'
+
+
+class PersistentCache:
+    """Size-bounded SQLite cache of fingerprints shared between processes.
+
+    ``max_entries`` bounds the rows in the database and ``memory_entries``
+    the in-memory front cache (0 disables it). ``version`` defaults to
+    ``rules_version()``. A ``SQLFingerprinter`` binds the cache to its
+    options; one cache serves fingerprinters with the same options only.
+    """
+
+    def __init__(self, path, max_entries=1000000, memory_entries=10000, version=None, timeout=5.0):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if memory_entries < 0:
+            raise ValueError("memory_entries must not be negative")
+        self.path = path
+        self.max_entries = max_entries
+        self.version = version if version is not None else rules_version()
+        self._options = None
+        self._prefix = self.version.encode('utf-8') + b'\0'
+        self._memory = FingerprintCache(memory_entries) if memory_entries else None
+        self._evict_every = max(1, min(1024, max_entries // 10))
+        self._lock = threading.Lock()
+        self._touched = []
+        self._puts = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        with self._lock, self._transaction():
+            self._evict()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM fingerprints').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def bind(self, options):
+        """Key entries by the fingerprinter `options` as well, since the
+        engine and limits change fingerprints. ``SQLFingerprinter`` calls
+        this with its options; binding to different options raises
+        ValueError, as a second ``PersistentCache`` on the same file is the
+        way to serve another configuration.
+        """
+        options = repr(sorted(options.items()))
+        with self._lock:
+            if self._options is not None and self._options != options:
+                raise ValueError("PersistentCache is already bound to fingerprinter options "
+                                 f"{self._options}, not {options}")
+            if self._options is not None:
+                return
+            self._options = options
+            self._prefix = f'{self.version}\0{options}\0'.encode('utf-8')
+        if self._memory is not None:
+            self._memory.clear()
+
+    def _key(self, sql):
+        if not isinstance(sql, str):
+            return None
+        return hashlib.blake2b(self._prefix + sql.encode('utf-8'), digest_size=16, person=_KEY_PERSON).digest()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so that concurrent
+        # writers wait for the busy timeout instead of failing on upgrade.
+        self._conn.execute('BEGIN IMMEDIATE')
+        return self._conn
+
+    def get(self, sql):
+        """Return the cached fingerprint of `sql`, or None."""
+        if self._memory is not None:
+            result = self._memory.get(sql)
+            if result is not None:
+                with self._lock:
+                    self._hits += 1
+                return result
+        key = self._key(sql)
+        with self._lock:
+            try:
+                row = None if key is None else self._conn.execute(
+                    'SELECT fingerprint, reason FROM fingerprints WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._touched.append(key)
+                    if len(self._touched) >= _TOUCH_BATCH:
+                        with self._transaction():
+                            self._touch()
+            except sqlite3.OperationalError:
+                row = None
+                self._touched = []
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        result, reason = row
+        if reason is not None:
+            from .degrade import DegradedFingerprint
+            result = DegradedFingerprint(result, reason)
+        if self._memory is not None:
+            self._memory.put(sql, result)
+        return result
+
+    def put(self, sql, fingerprint):
+        """Store the fingerprint of `sql`, evicting old entries if needed."""
+        key = self._key(sql)
+        if key is None:
+            return
+        reason = getattr(fingerprint, 'reason', None)
+        with self._lock:
+            try:
+                with self._transaction():
+                    self._conn.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)',
+                                       (key, str(fingerprint), reason, time.time_ns()))
+                    self._touch()
+                    self._puts += 1
+                    if self._puts % self._evict_every == 0:
+                        self._evict()
+            except sqlite3.OperationalError:
+                return
+        if self._memory is not None:
+            self._memory.put(sql, fingerprint)
+
+    def _touch(self):
+        if self._touched:
+            now = time.time_ns()
+            self._conn.executemany('UPDATE fingerprints SET used = ? WHERE key = ?',
+                                   [(now, key) for key in self._touched])
+            self._touched = []
+
+    def _evict(self):
+        excess = self._conn.execute('SELECT count(*) FROM fingerprints').fetchone()[0] - self.max_entries
+        if excess > 0:
+            excess += self.max_entries // 10
+            cursor = self._conn.execute(
+                'DELETE FROM fingerprints WHERE key IN (SELECT key FROM fingerprints ORDER BY used LIMIT ?)',
+                (excess,))
+            self._evictions += cursor.rowcount
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock, self._transaction():
+            self._conn.execute('DELETE FROM fingerprints')
+            self._touched = []
+            self._hits = self._misses = self._evictions = 0
+        if self._memory is not None:
+            self._memory.clear()
+
+    def close(self):
+        """Write pending timestamps and close the database."""
+        with self._lock:
+            if self._touched:
+                with self._transaction():
+                    self._touch()
+            self._conn.close()
+
+    def stats(self):
+        """Return a CacheStats snapshot; ``size`` counts rows in the database
+        and ``bytes`` is the size of the database file.
+        """
+        with self._lock:
+            size = self._conn.execute('SELECT count(*) FROM fingerprints').fetchone()[0]
+            pages = self._conn.execute('PRAGMA page_count').fetchone()[0]
+            page_size = self._conn.execute('PRAGMA page_size').fetchone()[0]
+            return CacheStats(self._hits, self._misses, self._evictions, size, pages * page_size)
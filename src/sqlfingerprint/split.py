@@ -0,0 +1,165 @@
+"""Statement boundaries of SQL scripts.
+
+A statement ends at a semicolon outside strings, quoted identifiers,
+comments and ``BEGIN ... END`` blocks. ``scan_statements`` finds those
+semicolons in text or bytes and can resume where a previous call stopped, so
+that ``core.split_statements`` (whole strings) and
+``stream.StatementSplitter`` (byte streams read in chunks) apply the same
+rules.
+
+Blocks follow sqlparse's statement splitter in a simplified form: ``BEGIN``
+opens a block unless it starts a transaction (``BEGIN;``, ``BEGIN
+TRANSACTION``, ``BEGIN WORK`` ...), ``END`` closes one, and inside a block
+``CASE`` opens one too so that its ``END`` does not close the block.
+``END IF``, ``END LOOP`` and the like close nothing, as their openers are
+not counted.
+"""
+import re
+
+# Tokens that may hold a semicolon: what opens each, and a pattern matching
+# the rest of it that captures its closing characters, if any. Backslashes
+# escape the character after them in quoted text. Comments are the ones
+# sqlparse reads: "--" and "# " up to a line break, which is left out of
+# them, and "/* */" unnested. The patterns stop before a trailing backslash
+# or "*" whose meaning depends on the next character, so that a token cut by
+# the end of a chunk is resumed where it stopped.
+_TOKENS = (
+    ("'", r"(?:[^'\\]|\\.)*(')?"),
+    ('"', r'(?:[^"\\]|\\.)*(")?'),
+    ('`', r'[^`]*(`)?'),
+    ('--', r'[^\r\n]*'),
+    ('# ', r'[^\r\n]*'),
+    ('/*', r'(?:[^*]|\*(?=[^/]))*(\*/)?'),
+)
+# PostgreSQL dollar quotes, $$...$$ or $tag$...$tag$, and the block keywords,
+# neither of which starts inside a name such as a$b$c or t.end. END IF, END
+# LOOP and the like are matched before END, which closes a block. Names are
+# ASCII word characters, "$" and any non-ASCII character, {high} in the
+# patterns, so that text and its UTF-8 bytes split alike. {start} checks that
+# the character just matched starts a word; it follows that character so
+# that the patterns keep the literal first characters the regex engine
+# searches for quickly.
+_BLOCKS = (r'(b{start}egin){stop}|(c{start}ase){stop}|(e{start}nd\s+(?:if|loop|while|for|repeat)){stop}'
+           r'|(e{start}nd(?:\s+case)?){stop}|(?P<dollar>\${start}(?:[a-z_{high}][\w{high}]*)?\$)(?:.*?((?P=dollar))|.*)')
+# Words after BEGIN that make it start a transaction rather than a block.
+_TRANSACTION = r'\s*(?:;|(?:transaction|work|tran|distributed|deferred|immediate|exclusive)(?![\w${high}]))'
+# The block groups in order, counted from the first of them.
+_BEGIN, _CASE, _END_OTHER, _END, _DOLLAR = range(5)
+
+
+class _Rules:
+    """The token rules compiled for ``str`` or, with `encode`, ``bytes``;
+    `high` is the range of non-ASCII characters."""
+
+    def __init__(self, encode, high):
+        def rule(pattern, flags=0):
+            pattern = pattern.replace('{start}', r'(?<![\w$.{high}].)').replace('{stop}', r'(?![\w${high}])')
+            return re.compile(encode(pattern.replace('{high}', high)), flags | re.ASCII)
+
+        # Group 1 is a statement end and the next groups close tokens, so a
+        # match without any is a line comment or an unterminated token.
+        # `blocks` adds a group for each block keyword and one opening a
+        # dollar quote; `plain` leaves them out, which makes it faster, for
+        # text that has neither "$" nor "begin".
+        plain = '(;)' + ''.join(f'|{re.escape(opener)}{rest}' for opener, rest in _TOKENS)
+        self.plain = rule(plain, re.DOTALL)
+        self.blocks = rule(plain + '|' + _BLOCKS, re.IGNORECASE | re.DOTALL)
+        self.first = self.plain.groups + 1
+        self.tokens = [rule(rest, re.DOTALL) for _, rest in _TOKENS]
+        self.transaction = rule(_TRANSACTION, re.IGNORECASE)
+        self.dollar, self.begin = encode('$'), encode('begin')
+        # Whitespace and a word after a keyword, which the next chunk may
+        # continue.
+        self.tail = rule(r'\s*[\w${high}]*')
+        # The state of a token from its first character, and the line
+        # comments, which a line break closes rather than a captured group.
+        self.states = {encode(opener)[0]: state for state, (opener, _) in enumerate(_TOKENS)}
+        self.lines = {state for state, (_, rest) in enumerate(_TOKENS) if '(' not in rest}
+        # Trailing characters that may start a two-character opener, and a
+        # trailing word that the next chunk may turn into a block keyword or
+        # a dollar quote tag, which PostgreSQL limits to 63 bytes.
+        self.partial = tuple(encode(opener[0]) for opener, _ in _TOKENS if len(opener) > 1)
+        self.word = rule(r'(?<![\w${high}])(?:[a-z]{1,5}|\$[\w{high}]{0,63})\Z', re.IGNORECASE)
+
+
+_TEXT = _Rules(str, '\x80-\U0010ffff')
+_BYTES = _Rules(lambda text: text.encode('ascii'), r'\x80-\xff')
+
+
+def scan_statements(buf, pos=0, state=None, final=True):
+    """Scan `buf` (text or bytes) from `pos` in `state` for the semicolons
+    ending statements. `state` is None at the start of the input and
+    otherwise what the previous call returned.
+
+    Returns ``(ends, pos, state)``: the offsets of those semicolons and where
+    to resume once more input is appended. Unless `final`, text whose meaning
+    depends on what follows it, such as a trailing "-", name or BEGIN, is left
+    for that next call.
+    """
+    rules = _TEXT if isinstance(buf, str) else _BYTES
+    token, depth = state or (None, 0)
+    ends = []
+    end = len(buf)
+    if token is not None:
+        pos, token = _resume(rules, buf, pos, token)
+        if token is not None:
+            return ends, pos, (token, depth)
+    rest = buf[pos:]
+    normal = rules.blocks if depth or rules.dollar in rest or rules.begin in rest.lower() else rules.plain
+    while True:
+        m = normal.search(buf, pos)
+        if m is None:
+            break
+        group = m.lastindex
+        pos = m.end()
+        if group is None:
+            token = rules.states[buf[m.start()]]
+            if token not in rules.lines or pos == end:
+                return ends, pos, (token, depth)
+        elif group == 1:
+            if not depth:
+                ends.append(m.start())
+        elif group < rules.first:
+            continue
+        elif group - rules.first < _DOLLAR:
+            if not final and rules.tail.match(buf, pos).end() == end:
+                return ends, m.start(), _state(None, depth)
+            keyword = group - rules.first
+            if keyword == _BEGIN:
+                if rules.transaction.match(buf, pos) is None:
+                    depth += 1
+            elif keyword == _CASE:
+                if depth:
+                    depth += 1
+            elif keyword == _END:
+                depth = max(0, depth - 1)
+        elif group - rules.first == _DOLLAR:
+            # An unterminated dollar quote; the end of a chunk may have cut
+            # its closer.
+            closer = m.group(group)
+            return ends, max(m.end(group), end - len(closer) + 1), (closer, depth)
+    if not final:
+        m = rules.word.search(buf, max(pos, end - 64))  # the longest such word
+        if m:
+            return ends, m.start(), _state(None, depth)
+        if pos < end and buf[-1:] in rules.partial:
+            return ends, end - 1, _state(None, depth)
+    return ends, end, _state(None, depth)
+
+
+def _state(token, depth):
+    return None if token is None and not depth else (token, depth)
+
+
+def _resume(rules, buf, pos, token):
+    """Scan the rest of a token cut by the end of the previous chunk;
+    returns where it ends and None, or where to resume and the token."""
+    if isinstance(token, int):
+        m = rules.tokens[token].match(buf, pos)
+        if m.lastindex is None and (token not in rules.lines or m.end() == len(buf)):
+            return m.end(), token
+        return m.end(), None
+    found = buf.find(token, pos)
+    if found < 0:
+        return max(pos, len(buf) - len(token) + 1), token
+    return found + len(token), None
@@ -0,0 +1,125 @@
+"""Streaming statement splitting and fingerprinting.
+
+``StatementSplitter`` cuts a byte stream into statements at semicolons that
+are not inside a string, quoted identifier or comment, by the rules in
+``split.py`` that ``split_statements`` uses too, and only buffers the
+statement it is currently reading. ``fingerprint_stream`` runs it over a file
+or file object and fingerprints every statement.
+"""
+import gzip
+import mmap
+import sys
+from collections import namedtuple
+
+from .core import SQLFingerprinter
+from .digest import fingerprint_digest
+from .split import scan_statements
+
+CHUNK_SIZE = 1 << 20
+GZIP_MAGIC = b'\x1f\x8b'
+
+StatementFingerprint = namedtuple('StatementFingerprint', 'fingerprint offset digest')
+
+_WHITESPACE = b' \t\r\n\f\v'
+
+
+class StatementSplitter:
+    """Incrementally split a byte stream into statements.
+
+    ``feed`` returns the ``(offset, statement)`` pairs completed by a chunk,
+    where ``offset`` is the byte offset of the statement's first
+    non-whitespace byte in the stream. The terminating semicolon is not part
+    of the statement and blank statements are skipped. ``close`` returns the
+    statement left over at the end of the stream, if any.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        # Absolute offset of _buf[0], scan position in _buf and current state.
+        self._base = 0
+        self._pos = 0
+        self._state = None
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        statements = []
+        ends, pos, self._state = scan_statements(buf, self._pos, self._state, final=False)
+        start = 0
+        for stop in ends:
+            self._emit(statements, start, stop)
+            start = stop + 1
+        if start:
+            del buf[:start]
+            self._base += start
+            pos -= start
+        self._pos = pos
+        return statements
+
+    def close(self):
+        statements = []
+        self._emit(statements, 0, len(self._buf))
+        self._buf = bytearray()
+        self._pos = 0
+        self._state = None
+        return statements
+
+    def _emit(self, statements, start, stop):
+        buf = self._buf
+        while start < stop and buf[start] in _WHITESPACE:
+            start += 1
+        if start < stop:
+            statements.append((self._base + start, bytes(buf[start:stop])))
+
+
+def iter_statements(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield ``(offset, statement)`` pairs from a binary file object."""
+    splitter = StatementSplitter()
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            break
+        yield from splitter.feed(data)
+    yield from splitter.close()
+
+
+def open_source(path, use_mmap=False):
+    """Open `path` ("-" for stdin) for reading bytes.
+
+    Gzip input is detected by its magic number and decompressed on the fly.
+    ``use_mmap`` maps plain files into memory instead of reading them through
+    a buffer.
+    """
+    if path == '-':
+        fileobj = sys.stdin.buffer
+    else:
+        fileobj = open(path, 'rb')
+    if fileobj.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if use_mmap and path != '-':
+        try:
+            mapped = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return fileobj
+        fileobj.close()
+        return mapped
+    return fileobj
+
+
+def fingerprint_stream(fileobj, fingerprinter=None, encoding='utf-8', chunk_size=CHUNK_SIZE):
+    """Fingerprint every statement read from a binary file object.
+
+    Yields a ``StatementFingerprint`` per statement with a non-empty
+    fingerprint. A statement that fails yields its ``SQLFingerprintError`` as
+    the fingerprint and None as the digest.
+    """
+    if fingerprinter is None:
+        fingerprinter = SQLFingerprinter()
+    for offset, statement in iter_statements(fileobj, chunk_size):
+        result = fingerprinter._fingerprint_or_error(statement.decode(encoding, 'replace'))
+        if isinstance(result, str):
+            if result:
+                yield StatementFingerprint(result, offset, fingerprint_digest(result).hex())
+        else:
+            yield StatementFingerprint(result, offset, None)
@@ -0,0 +1,114 @@
+import pickle
+import random
+
+import pytest
+
+from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint.aggregate import Aggregator, LatencySketch
+
+
+class TestLatencySketch:
+    def test_quantiles_within_accuracy(self):
+        sketch = LatencySketch(relative_accuracy=0.01)
+        values = [i / 1000 for i in range(1, 10001)]
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+    def test_merge(self):
+        a, b, both = LatencySketch(), LatencySketch(), LatencySketch()
+        for value in range(1, 101):
+            (a if value % 2 else b).add(value)
+            both.add(value)
+        a.merge(b)
+        assert a.buckets == both.buckets
+        assert a.quantile(0.5) == both.quantile(0.5)
+
+    def test_empty_and_zero(self):
+        sketch = LatencySketch()
+        assert sketch.quantile(0.5) is None
+        sketch.add(0)
+        assert sketch.quantile(0.5) == 0.0
+
+
+class TestAggregator:
+    def test_group_by_fingerprint(self):
+        aggregator = Aggregator(SQLFingerprinter(engine='fast'))
+        aggregator.add("SELECT * FROM users WHERE id = 1", 0.5, rows=1)
+        aggregator.add("SELECT * FROM users WHERE id = 2", 1.5, rows=1)
+        aggregator.add("DELETE FROM users WHERE id = 3", 3.0)
+        stats = aggregator["select * from users where id = ?"]
+        assert (stats.count, stats.total, stats.min, stats.max, stats.rows) == (2, 2.0, 0.5, 1.5, 2)
+        assert stats.mean == 1.0
+        assert [fp for fp, _ in aggregator.top(1, by='total')] == ["delete from users where id = ?"]
+
+    def test_merge_partials(self):
+        records = [(f"SELECT * FROM t{i % 5} WHERE id = {i}", i / 10) for i in range(100)]
+        whole, left, right = Aggregator(), Aggregator(), Aggregator()
+        for i, (sql, duration) in enumerate(records):
+            whole.add(sql, duration)
+            (left if i < 50 else right).add(sql, duration)
+        left = pickle.loads(pickle.dumps(left))
+        left.merge(right)
+        assert left.records == whole.records
+        for fingerprint, stats in whole.stats.items():
+            merged = left[fingerprint]
+            assert (merged.count, merged.min, merged.max) == (stats.count, stats.min, stats.max)
+            assert merged.total == pytest.approx(stats.total)
+            assert merged.quantile(0.5) == stats.quantile(0.5)
+
+    def test_bounded_heavy_hitters(self):
+        aggregator = Aggregator(capacity=10, relative_accuracy=0)
+        rng = random.Random(1)
+        stream = [f"hot{i}" for i in range(3) for _ in range(300)]
+        stream += [f"cold{rng.randrange(1000)}" for _ in range(600)]
+        rng.shuffle(stream)
+        for fingerprint in stream:
+            aggregator.add_fingerprint(fingerprint, 1.0)
+        assert len(aggregator) == 10
+        assert {fp for fp, _ in aggregator.top(3)} == {"hot0", "hot1", "hot2"}
+        for fp, stats in aggregator.top(3):
+            assert stats.count - stats.error <= 300 <= stats.count
+
+    def test_bounded_merge(self):
+        a, b = Aggregator(capacity=2), Aggregator(capacity=2)
+        for fingerprint, n in (("x", 5), ("y", 1)):
+            for _ in range(n):
+                a.add_fingerprint(fingerprint, 1.0)
+        for fingerprint, n in (("y", 1), ("z", 3)):
+            for _ in range(n):
+                b.add_fingerprint(fingerprint, 1.0)
+        a.merge(b)
+        assert set(a.stats) == {"x", "z"}
+        a.add_fingerprint("w", 1.0)
+        assert "z" not in a
+
+    def test_bounded_mean_covers_seen_records(self):
+        aggregator = Aggregator(capacity=1)
+        for _ in range(9):
+            aggregator.add("SELECT 1 FROM a", 1.0)
+        aggregator.add("SELECT 1 FROM b", 10.0)
+        stats = aggregator["select ? from b"]
+        assert (stats.count, stats.error, stats.total) == (10, 9, 10.0)
+        assert stats.mean == stats.min == 10.0
+        other = Aggregator(capacity=1)
+        other.add("SELECT 2 FROM c", 4.0)
+        aggregator.merge(other)
+        for stats in aggregator.stats.values():
+            assert stats.count > stats.count - stats.error == 1
+            assert stats.mean == stats.min
+
+    def test_bounded_merge_heavy_hitter_evicted_in_one_shard(self):
+        a, b = Aggregator(capacity=3, relative_accuracy=0), Aggregator(capacity=3, relative_accuracy=0)
+        shards = (["h"] * 4 + [f"a{i}" for i in range(12)], ["h"] * 4 + ["x"] * 6 + ["y"])
+        for aggregator, stream in zip((a, b), shards):
+            for fingerprint in stream:
+                aggregator.add_fingerprint(fingerprint, 1.0)
+        assert "h" not in a
+        a.merge(b)
+        assert "h" in a
+        for fingerprint, stats in a.stats.items():
+            true_count = sum(stream.count(fingerprint) for stream in shards)
+            assert stats.count - stats.error <= true_count <= stats.count
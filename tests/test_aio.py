@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from sqlfingerprint import SQLFingerprintError
+from sqlfingerprint.aio import AsyncFingerprinter
+
+LONG = "SELECT * FROM t WHERE " + " AND ".join(f"c{i} = {i}" for i in range(50))
+LONG_FINGERPRINT = "select * from t where " + " and ".join(f"c{i} = ?" for i in range(50))
+
+
+class TestAsyncFingerprinter:
+    def test_afingerprint_inline_and_offloaded(self):
+        async def main():
+            fingerprinter = AsyncFingerprinter(inline_threshold=100)
+            return (await fingerprinter.afingerprint("SELECT 1"),
+                    await fingerprinter.afingerprint(LONG))
+
+        assert asyncio.run(main()) == ("select ?", LONG_FINGERPRINT)
+
+    def test_afingerprint_error(self):
+        async def main():
+            await AsyncFingerprinter(inline_threshold=0).afingerprint(42)
+
+        with pytest.raises(SQLFingerprintError):
+            asyncio.run(main())
+
+    def test_iter_preserves_order(self):
+        queries = [LONG if i % 3 else f"SELECT {i}" for i in range(20)] + [42]
+
+        async def source():
+            for sql in queries:
+                yield sql
+
+        async def main():
+            with ThreadPoolExecutor(4) as executor:
+                fingerprinter = AsyncFingerprinter(executor=executor, max_concurrency=3, inline_threshold=100)
+                return [result async for result in fingerprinter.afingerprint_iter(source())]
+
+        results = asyncio.run(main())
+        assert results[:20] == [LONG_FINGERPRINT if i % 3 else "select ?" for i in range(20)]
+        assert isinstance(results[20], SQLFingerprintError)
+
+    def test_backpressure(self):
+        pulled = []
+
+        def source():
+            for i in range(10):
+                pulled.append(i)
+                yield LONG
+
+        async def main():
+            fingerprinter = AsyncFingerprinter(max_concurrency=2, inline_threshold=0)
+            consumed = 0
+            async for _ in fingerprinter.afingerprint_iter(source()):
+                consumed += 1
+                assert len(pulled) <= consumed + 2
+
+        asyncio.run(main())
+
+    def test_process_executor(self):
+        async def main():
+            with ProcessPoolExecutor(2) as executor:
+                fingerprinter = AsyncFingerprinter(executor=executor, inline_threshold=0)
+                return await asyncio.gather(*(fingerprinter.afingerprint(LONG) for _ in range(4)))
+
+        assert asyncio.run(main()) == [LONG_FINGERPRINT] * 4
+
+    def test_process_executor_binary(self):
+        async def main():
+            with ProcessPoolExecutor(2) as executor:
+                fingerprinter = AsyncFingerprinter(executor=executor, inline_threshold=100)
+                data = LONG.encode()
+                return await asyncio.gather(fingerprinter.afingerprint(memoryview(data)),
+                                            fingerprinter.afingerprint(data))
+
+        assert asyncio.run(main()) == [LONG_FINGERPRINT] * 2
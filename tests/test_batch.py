@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from sqlfingerprint import FingerprintCache, SQLFingerprinter, SQLFingerprintError
+
+QUERIES = [f"SELECT * FROM users WHERE id = {i}" for i in range(50)] + [
+    "SELECT name FROM t WHERE x IN (1, 2, 3)",
+    None,
+    42,
+]
+
+
+class TestFingerprintMany:
+    def setup_method(self):
+        self.fingerprinter = SQLFingerprinter()
+
+    def check(self, results):
+        assert len(results) == len(QUERIES)
+        assert results[:50] == ["select * from users where id = ?"] * 50
+        assert results[50] == "select name from t where x in (?)"
+        assert results[51] == ""
+        assert isinstance(results[52], SQLFingerprintError)
+
+    def test_in_process(self):
+        self.check(list(self.fingerprinter.fingerprint_many(QUERIES)))
+
+    def test_process_pool(self):
+        self.check(list(self.fingerprinter.fingerprint_many(iter(QUERIES), workers=2, chunksize=8)))
+
+    def test_binary_queries(self):
+        queries = [b"SELECT 1", bytearray(b"SELECT a FROM t WHERE b = 'x'"), memoryview(b"UPDATE t SET a = 2")]
+        expected = ["select ?", "select a from t where b = ?", "update t set a = ?"]
+        assert list(self.fingerprinter.fingerprint_many(queries)) == expected
+        assert list(self.fingerprinter.fingerprint_many(queries, workers=2, chunksize=1)) == expected
+
+    def test_unordered(self):
+        pairs = list(SQLFingerprinter(engine='fast').fingerprint_many_unordered(QUERIES, workers=2, chunksize=8))
+        results = [result for _, result in sorted(pairs, key=lambda pair: pair[0])]
+        self.check(results)
+
+    @pytest.mark.parametrize('query', [42, ['x'], {'a': 1}])
+    def test_unhashable_with_cache(self, query):
+        fingerprinter = SQLFingerprinter(cache=FingerprintCache())
+        with pytest.raises(SQLFingerprintError):
+            fingerprinter.fingerprint(query)
+        results = list(fingerprinter.fingerprint_many(["SELECT 1", query, "SELECT 2"]))
+        assert results[0] == results[2] == "select ?"
+        assert isinstance(results[1], SQLFingerprintError)
+
+    @pytest.mark.parametrize('method', ['fingerprint_many', 'fingerprint_many_unordered'])
+    def test_bounded_read_ahead(self, method):
+        pulled = 0
+
+        def queries():
+            nonlocal pulled
+            for i in range(100000):
+                pulled += 1
+                yield f"SELECT * FROM t WHERE id = {i}"
+
+        results = getattr(self.fingerprinter, method)(queries(), workers=2, chunksize=10)
+        consumed = [next(results) for _ in range(25)]
+        time.sleep(0.5)
+        assert len(consumed) == 25
+        # The three chunks the results came from and a window of 2 * 2 more.
+        assert pulled <= (3 + 4) * 10
+        results.close()
@@ -0,0 +1,70 @@
+import pytest
+
+from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint.bulk import collapse_bulk
+
+
+class TestCollapseBulk:
+    def test_in_list(self):
+        assert collapse_bulk("SELECT * FROM t WHERE id IN (1, 2, ?)") == "SELECT * FROM t WHERE id IN (?)"
+
+    def test_values_rows(self):
+        assert collapse_bulk("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')") == \
+            "INSERT INTO t (a, b) VALUES ('sqlfingerprint:bulk')"
+
+    def test_untouched(self):
+        for sql in ("SELECT * FROM t WHERE id IN (1)",
+                    "SELECT * FROM t WHERE id IN (1 - 2, 3)",
+                    "SELECT * FROM t WHERE id IN (1, nullif(a, 2))",
+                    "SELECT * FROM t WHERE id IN ('a\\\\', 'b')",
+                    "SELECT 'x IN (1, 2)' FROM t",
+                    "SELECT * FROM t -- IN (1, 2)",
+                    "SELECT t.in(1, 2) FROM t",
+                    "INSERT INTO t VALUES (1, 2)",
+                    "INSERT INTO t VALUES (1, 2), (3, 4), (now(), 5)"):
+            assert collapse_bulk(sql) is sql
+
+    def test_literal_spellings(self):
+        for items in ("1, -2", "+1, 2.5", "1e3, 1.5E-3, .5", "0x1F, 2", "NULL, 1", "TRUE, false",
+                      "'a\\'b', 'c'", "'it''s', ?"):
+            sql = f"SELECT * FROM t WHERE id IN ({items})"
+            assert collapse_bulk(sql) in ("SELECT * FROM t WHERE id IN (?)",
+                                          "SELECT * FROM t WHERE id IN ('sqlfingerprint:bulk')")
+
+    def test_quote_in_comment(self):
+        sql = "SELECT a FROM t -- don't\nWHERE b IN (1, 2) AND c = 'x'"
+        assert collapse_bulk(sql) == "SELECT a FROM t -- don't\nWHERE b IN (?) AND c = 'x'"
+
+
+@pytest.mark.parametrize('engine', ['sqlparse', 'fast'])
+class TestBulkStatements:
+    def test_huge_in_list(self, engine):
+        sql = "SELECT * FROM t WHERE id IN (%s)" % ', '.join(str(i) for i in range(20000))
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "select * from t where id in (?)"
+
+    def test_huge_values_batch(self, engine):
+        sql = "INSERT INTO t (a, b) VALUES %s" % ', '.join(f"({i}, 'name{i}')" for i in range(20000))
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "insert into t (a, b) values (?)"
+
+    def test_multi_row_values(self, engine):
+        sql = "INSERT INTO t VALUES (1, 'a'),(2, 'b')"
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "insert into t values (?)"
+
+    @pytest.mark.parametrize('row', ["({i}, NULL)", "({i}, 1.5e3)", "(-{i}, TRUE)", "({i}, 'a\\'b')"])
+    def test_huge_values_batch_any_literals(self, engine, row):
+        sql = "INSERT INTO t (a, b) VALUES %s" % ', '.join(row.format(i=i) for i in range(20000))
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "insert into t (a, b) values (?)"
+
+    def test_huge_signed_in_list(self, engine):
+        sql = "SELECT * FROM t WHERE id IN (%s)" % ', '.join(str(-i) for i in range(20000))
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "select * from t where id in (?)"
+
+    @pytest.mark.parametrize('rows', ["(1), (2)", "(1e3), (2)", "(-1), (2)", "(NULL), (2)", "(TRUE), (2)",
+                                      "('a\\'b'), ('c')"])
+    def test_values_shape_independent_of_spelling(self, engine, rows):
+        assert SQLFingerprinter(engine=engine).fingerprint(f"INSERT INTO t VALUES {rows}") == \
+            "insert into t values (?)"
+
+    def test_select_clause_strings_kept(self, engine):
+        sql = "SELECT 'a' IN ('x', 'y') FROM t WHERE b IN ('x', 'y')"
+        assert SQLFingerprinter(engine=engine).fingerprint(sql) == "select 'a' in ('x', 'y') from t where b in (?)"
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from sqlfingerprint import FingerprintCache, SQLFingerprinter
+
+
+class TestFingerprintCache:
+    def test_hits_and_misses(self):
+        cache = FingerprintCache()
+        fingerprinter = SQLFingerprinter(cache=cache)
+        sql = "SELECT * FROM users WHERE id = 123"
+        assert fingerprinter.fingerprint(sql) == "select * from users where id = ?"
+        assert fingerprinter.fingerprint(sql) == "select * from users where id = ?"
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+    def test_lru_eviction_by_entries(self):
+        cache = FingerprintCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats().evictions == 1
+
+    def test_eviction_by_bytes(self):
+        cache = FingerprintCache(max_entries=None, max_bytes=400)
+        for i in range(20):
+            cache.put(f"select {i}", "select ?")
+        stats = cache.stats()
+        assert stats.bytes <= 400
+        assert stats.evictions == 20 - stats.size
+
+    def test_oversized_entry_not_stored(self):
+        cache = FingerprintCache(max_bytes=100)
+        cache.put("x" * 1000, "?")
+        assert len(cache) == 0
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            FingerprintCache(max_entries=0)
+
+    def test_shared_between_threads(self):
+        cache = FingerprintCache(max_entries=50)
+        fingerprinter = SQLFingerprinter(engine='fast', cache=cache)
+        queries = [f"SELECT * FROM t{i % 100} WHERE id = {i}" for i in range(400)]
+
+        def work():
+            for sql in queries:
+                assert fingerprinter.fingerprint(sql).startswith("select * from t")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats.hits + stats.misses == 1600
+        assert stats.size <= 50
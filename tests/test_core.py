@@ -1,4 +1,9 @@
+import pytest
+import sqlparse
+from sqlparse import sql as S, tokens as T
+
 from sqlfingerprint import SQLFingerprinter
+from sqlfingerprint.core import _render_statement
 
 
 class TestSQLFingerprinter:
@@ -235,6 +240,21 @@ class TestSQLFingerprinter:
         expected = ""
         assert self.fingerprinter.fingerprint(sql) == expected
 
+    def test_binary_input(self):
+        sql = "SELECT name FROM users WHERE city = 'Zürich' AND id = 7"
+        expected = "select name from users where city = ? and id = ?"
+        data = sql.encode('utf-8')
+        for value in (data, bytearray(data), memoryview(data)[:]):
+            assert self.fingerprinter.fingerprint(value) == expected
+        assert self.fingerprinter.fingerprint(b"") == ""
+
+    def test_binary_input_encoding(self):
+        fingerprinter = SQLFingerprinter(engine=self.fingerprinter.engine, encoding='latin-1')
+        sql = "SELECT 'café' AS name FROM t WHERE x = 'é'"
+        assert fingerprinter.fingerprint(sql.encode('latin-1')) == "select 'café' as name from t where x = ?"
+        # Undecodable bytes are replaced rather than failing the query.
+        assert self.fingerprinter.fingerprint(b"SELECT '\xff' FROM t") == "select '\ufffd' from t"
+
     def test_comments(self):
         sql = """
         -- This is a comment
@@ -416,3 +436,46 @@ class TestSQLFingerprinter:
         sql = "SELECT * FROM data WHERE value LIKE '50\\_%\\_\\%' ESCAPE '\\'"
         expected = "select * from data where value like ? escape ?"
         assert self.fingerprinter.fingerprint(sql) == expected
+
+    def test_deeply_nested_parentheses(self):
+        depth = 90
+        sql = "SELECT id FROM t WHERE a = " + "(" * depth + "1" + ")" * depth
+        expected = "select id from t where a = " + "(" * depth + "?" + ")" * depth
+        assert self.fingerprinter.fingerprint(sql) == expected
+
+
+class TestRenderStatement:
+    def test_deeper_than_recursion_limit(self):
+        token = S.Token(T.Number.Integer, '1')
+        for _ in range(5000):
+            token = S.Parenthesis([S.Token(T.Punctuation, '('), token, S.Token(T.Punctuation, ')')])
+        stmt = S.Statement([S.Token(T.Keyword.DML, 'SELECT'), S.Token(T.Whitespace, ' '), token])
+        assert _render_statement(stmt) == 'SELECT ' + '(' * 5000 + '?' + ')' * 5000
+
+    def test_leaves_tree_untouched(self):
+        stmt = sqlparse.parse("SELECT 'a' FROM t WHERE b = 'c' AND d IN (1, 2) AND e = TRUE")[0]
+        before = str(stmt)
+        assert _render_statement(stmt) == "SELECT 'a' FROM t WHERE b = ? AND d IN (?, ?) AND e = ?"
+        assert str(stmt) == before
+
+
+class TestFastEngine(TestSQLFingerprinter):
+    def setup_method(self):
+        self.fingerprinter = SQLFingerprinter(engine='fast')
+
+    def test_fallback_to_sqlparse(self):
+        sql = "CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(20) DEFAULT 'x')"
+        assert self.fingerprinter.fingerprint(sql) == SQLFingerprinter().fingerprint(sql)
+
+    def test_statement_in_values_row(self):
+        from sqlfingerprint.lexer import fast_fingerprint
+        for sql, expected in (
+                ("INSERT INTO t (a) VALUES ((SELECT 1))", "insert into t (a) values ((select ?))"),
+                ("INSERT INTO t VALUES ( (SELECT 1), 2)", "insert into t values ((select ?), ?)"),
+                ("INSERT INTO t VALUES (((SELECT a FROM u)))", "insert into t values (((select a from u)))")):
+            assert fast_fingerprint(sql) == expected
+            assert SQLFingerprinter().fingerprint(sql) == expected
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            SQLFingerprinter(engine='nope')
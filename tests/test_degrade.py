@@ -0,0 +1,130 @@
+import pickle
+import time
+
+import pytest
+
+from sqlfingerprint import DegradedFingerprint, FingerprintCache, Instrumentation, SQLFingerprinter
+from sqlfingerprint.degrade import degraded_fingerprint, exceeds_tokens
+
+WIDE = "SELECT " + ", ".join(f"c{i}" for i in range(3000)) + " FROM t WHERE id = 5"
+
+
+class TestDegradedFingerprint:
+    def test_masking(self):
+        sql = "SELECT  a, 'x''y' /* c */ -- z\n FROM T WHERE id IN (1, 2, 3) AND b = \"q\" AND c = 1.5e3"
+        result = degraded_fingerprint(sql, 'length')
+        assert result == "select a, ? from t where id in (?) and b = ? and c = ?"
+        assert result.reason == 'length'
+
+    def test_prefix(self):
+        assert degraded_fingerprint("SELECT a FROM t WHERE x = 1", prefix=10) == "select a f"
+
+    def test_unterminated_tokens(self):
+        assert degraded_fingerprint("SELECT 'abc") == "select ?"
+        assert degraded_fingerprint("SELECT 1 /* abc") == "select ?"
+
+    def test_linear_on_adversarial_input(self):
+        for sql in ["'" + "\\'" * 200000, "/*" * 200000, "'" * 300001, "(1, " * 100000]:
+            start = time.perf_counter()
+            degraded_fingerprint(sql)
+            exceeds_tokens(sql, 10 ** 9)
+            assert time.perf_counter() - start < 2
+
+    def test_exceeds_tokens(self):
+        assert not exceeds_tokens("select 1", 3)
+        assert exceeds_tokens("select 1", 2)
+        assert not exceeds_tokens("select 1.5e-3", 3)
+        assert not exceeds_tokens("select 'a''b' -- c\n", 6)
+
+    def test_pickle(self):
+        result = pickle.loads(pickle.dumps(degraded_fingerprint("SELECT 1", 'time')))
+        assert isinstance(result, DegradedFingerprint)
+        assert (result, result.reason) == ("select ?", 'time')
+
+
+class TestLimits:
+    def test_under_limits(self):
+        fingerprinter = SQLFingerprinter(max_length=1000, max_tokens=1000, time_budget=10)
+        result = fingerprinter.fingerprint("SELECT * FROM users WHERE id = 1")
+        assert result == "select * from users where id = ?"
+        assert not isinstance(result, DegradedFingerprint)
+
+    def test_max_length(self):
+        cache = FingerprintCache()
+        fingerprinter = SQLFingerprinter(max_length=100, cache=cache)
+        result = fingerprinter.fingerprint(WIDE)
+        assert isinstance(result, DegradedFingerprint)
+        assert result.reason == 'length'
+        assert len(cache) == 0
+
+    def test_max_tokens(self):
+        result = SQLFingerprinter(engine='fast', max_tokens=1000).fingerprint(WIDE)
+        assert result.reason == 'tokens'
+
+    def test_max_tokens_counts_collapsed_lists(self):
+        sql = "SELECT * FROM t WHERE id IN (%s)" % ", ".join(map(str, range(5000)))
+        result = SQLFingerprinter(max_tokens=100).fingerprint(sql)
+        assert result == "select * from t where id in (?)"
+        assert not isinstance(result, DegradedFingerprint)
+
+    def test_max_tokens_avoids_sqlparse_limit(self):
+        sql = "SELECT " + ", ".join(f"c{i}" for i in range(6000)) + " FROM t"
+        assert SQLFingerprinter(max_tokens=10000).fingerprint(sql).reason == 'tokens'
+
+    @pytest.mark.parametrize('engine', ['sqlparse', 'fast'])
+    def test_max_tokens_with_shape_cache(self, engine):
+        queries = ["SELECT * FROM t WHERE x = 7", "SELECT * FROM t WHERE x = 1.5",
+                   "SELECT * FROM t WHERE x = 'a b'", "SELECT * FROM t WHERE x = 1 AND y = 2"]
+        plain = SQLFingerprinter(engine=engine, max_tokens=15)
+        for order in (queries, queries[::-1]):
+            cached = SQLFingerprinter(engine=engine, max_tokens=15, shape_cache=FingerprintCache())
+            for sql in order:
+                result, expected = cached.fingerprint(sql), plain.fingerprint(sql)
+                assert (result, getattr(result, 'reason', None)) == (expected, getattr(expected, 'reason', None))
+
+    def test_time_budget(self):
+        cache = FingerprintCache()
+        fingerprinter = SQLFingerprinter(time_budget=1e-9, cache=cache)
+        result = fingerprinter.fingerprint("SELECT * FROM users WHERE id = 1")
+        assert result == "select * from users where id = ?"
+        assert result.reason == 'time'
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize('engine, stage', [('sqlparse', 'postprocess'), ('fast', 'fast_fingerprint')])
+    def test_time_budget_keeps_finished_fingerprint(self, monkeypatch, engine, stage):
+        # The budget runs out during the last stage, which has produced the
+        # fingerprint by the time the deadline is noticed.
+        from sqlfingerprint import core
+        core._load()
+        core._load_lexer()
+        last_stage = getattr(core, stage)
+
+        def slow(*args):
+            time.sleep(0.05)
+            return last_stage(*args)
+
+        monkeypatch.setattr(core, stage, slow)
+        result = SQLFingerprinter(engine=engine, time_budget=0.01).fingerprint("SELECT * FROM t WHERE id = 1")
+        assert result == "select * from t where id = ?"
+        assert not isinstance(result, DegradedFingerprint)
+
+    def test_degraded_prefix(self):
+        fingerprinter = SQLFingerprinter(max_length=100, degraded_prefix=50)
+        assert fingerprinter.fingerprint(WIDE) == fingerprinter.fingerprint(WIDE + " AND x = 'y'")
+        assert len(fingerprinter.fingerprint(WIDE)) <= 50
+
+    def test_instrumentation(self):
+        instrumentation = Instrumentation()
+        SQLFingerprinter(max_length=100, instrumentation=instrumentation).fingerprint(WIDE)
+        assert list(instrumentation.stats().stages) == ['cache', 'degrade']
+
+    def test_pool_workers_use_limits(self):
+        fingerprinter = SQLFingerprinter(max_length=100)
+        results = list(fingerprinter.fingerprint_many([WIDE, "SELECT 1"], workers=2))
+        assert results[0].reason == 'length'
+        assert results[1] == "select ?"
+
+    def test_invalid_limits(self):
+        for name in ('max_length', 'max_tokens', 'time_budget', 'degraded_prefix'):
+            with pytest.raises(ValueError):
+                SQLFingerprinter(**{name: 0})
@@ -0,0 +1,46 @@
+from array import array
+
+import pytest
+
+from sqlfingerprint import SQLFingerprinter, SQLFingerprintError
+from sqlfingerprint.digest import fingerprint_digest
+
+
+class TestDigest:
+    def setup_method(self):
+        self.fingerprinter = SQLFingerprinter()
+
+    def test_stable_values(self):
+        # Digests are persisted keys; these values must never change.
+        assert fingerprint_digest("select ?").hex() == "cd8786a6c8d278e8"
+        assert fingerprint_digest("select ?", 128).hex() == "f9ff70f4e9fa54a69acc4224200e352f"
+
+    def test_outputs(self):
+        sql = "SELECT 1"
+        raw = self.fingerprinter.digest(sql)
+        assert len(raw) == 8
+        assert self.fingerprinter.digest(sql, output='int') == int.from_bytes(raw, 'big')
+        assert self.fingerprinter.digest(sql, output='hex') == raw.hex()
+        assert len(self.fingerprinter.digest(sql, bits=128)) == 16
+
+    def test_same_fingerprint_same_digest(self):
+        assert self.fingerprinter.digest("SELECT * FROM t WHERE id = 1") == \
+            self.fingerprinter.digest("select * from t where id = 2")
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            self.fingerprinter.digest("SELECT 1", bits=32)
+        with pytest.raises(ValueError):
+            self.fingerprinter.digest("SELECT 1", output='str')
+
+    def test_digest_many(self):
+        queries = ["SELECT 1", "SELECT * FROM t WHERE id = 1"]
+        digests = self.fingerprinter.digest_many(queries)
+        assert digests == array('Q', [self.fingerprinter.digest(sql, output='int') for sql in queries])
+        wide = self.fingerprinter.digest_many(queries, bits=128)
+        assert len(wide) == 4
+        assert (wide[0] << 64) | wide[1] == self.fingerprinter.digest("SELECT 1", bits=128, output='int')
+
+    def test_digest_many_error(self):
+        with pytest.raises(SQLFingerprintError):
+            self.fingerprinter.digest_many(["SELECT 1", 42])
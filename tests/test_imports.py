@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+import sqlfingerprint
+
+
+def _modules_after(code):
+    script = f"import sys; {code}; print(' '.join(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+class TestLazyImports:
+    def test_import_does_not_load_sqlparse(self):
+        modules = _modules_after("import sqlfingerprint")
+        assert 'sqlparse' not in modules
+        assert 'sqlfingerprint.core' not in modules
+
+    def test_constructing_does_not_load_sqlparse(self):
+        modules = _modules_after("from sqlfingerprint import SQLFingerprinter; SQLFingerprinter(engine='fast')")
+        assert 'sqlfingerprint.core' in modules
+        assert 'sqlparse' not in modules
+        assert 'sqlfingerprint.bulk' not in modules
+
+    def test_first_fingerprint_loads_engine(self):
+        modules = _modules_after("from sqlfingerprint import SQLFingerprinter; "
+                                 "SQLFingerprinter().fingerprint('SELECT 1')")
+        assert 'sqlparse' in modules
+        assert 'sqlfingerprint.lexer' not in modules
+        assert 'sqlfingerprint.digest' not in modules
+
+    def test_public_names(self):
+        for name in sqlfingerprint.__all__:
+            assert getattr(sqlfingerprint, name) is not None
+        assert set(sqlfingerprint.__all__) <= set(dir(sqlfingerprint))
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError):
+            sqlfingerprint.nope
@@ -0,0 +1,155 @@
+import pickle
+
+import pytest
+
+from sqlfingerprint import FingerprintCache, FingerprintIndex, SQLFingerprinter, SQLFingerprintError
+
+
+class _CountingFingerprinter(SQLFingerprinter):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.calls = 0
+
+    def fingerprint(self, sql):
+        self.calls += 1
+        return super().fingerprint(sql)
+
+
+@pytest.fixture
+def index():
+    return FingerprintIndex.from_queries([
+        "SELECT * FROM users WHERE id = 1",
+        "SELECT name FROM users WHERE email = 'a@b.c' AND active = TRUE",
+        "UPDATE accounts SET balance = balance - 10 WHERE id = 3",
+    ])
+
+
+class TestFingerprintIndex:
+    def test_match(self, index):
+        assert index.match("select * from USERS where id = 42") == "select * from users where id = ?"
+        assert index.match("SELECT name FROM users WHERE email = 'x' AND active = false") == \
+            "select name from users where email = ? and active = ?"
+
+    def test_no_match(self, index):
+        assert index.match("SELECT * FROM orders WHERE id = 1") is None
+        assert index.match("SELECT * FROM users WHERE id = 1 AND x = 2") is None
+        assert index.match("SELECT * FROM users") is None
+        assert index.match("") is None
+
+    def test_rejects_without_fingerprinting(self):
+        # The lexer stops at the first unknown word, before there is a
+        # fingerprint to cache.
+        cache = FingerprintCache()
+        index = FingerprintIndex.from_fingerprints(["select * from users where id = ?"],
+                                                   SQLFingerprinter(engine='fast', cache=cache))
+        assert index.match("DELETE FROM users WHERE id = 1") is None
+        assert index.match("SELECT * FROM users WHERE name = 'x'") is None
+        assert len(cache) == 0
+        assert index.match("SELECT * FROM users WHERE id = 7") == "select * from users where id = ?"
+        assert len(cache) == 1
+
+    def test_rejects_without_fingerprinting_sqlparse(self):
+        fingerprinter = _CountingFingerprinter()
+        index = FingerprintIndex.from_fingerprints(["select * from users where id = ?"], fingerprinter)
+        assert index.match("DELETE FROM users WHERE id = 1") is None
+        assert index.match("SELECT * FROM users") is None
+        assert fingerprinter.calls == 0
+        assert index.match("SELECT * FROM users WHERE id = 7") == "select * from users where id = ?"
+        assert fingerprinter.calls == 1
+
+    def test_words_match_but_fingerprint_differs(self):
+        index = FingerprintIndex.from_fingerprints(["select * from t where a = ?"])
+        assert index.match("SELECT * FROM t WHERE a > 1") is None
+
+    def test_values(self):
+        index = FingerprintIndex.from_fingerprints({
+            "select * from users where id = ?": 'allow',
+            "delete from users where id = ?": 'deny',
+        })
+        assert len(index) == 2
+        assert "delete from users where id = ?" in index
+        assert index.get("DELETE FROM users WHERE id = 5") == 'deny'
+        assert index.get("SELECT * FROM users WHERE id = 5") == 'allow'
+        assert index.get("SELECT 1", 'unknown') == 'unknown'
+
+    def test_add_query(self):
+        index = FingerprintIndex()
+        assert index.add_query("SELECT a FROM t WHERE b IN (1, 2, 3)", 'x') == "select a from t where b in (?)"
+        assert index.get("select a from t where b in (4, 5)") == 'x'
+
+    def test_binary_input(self):
+        fingerprinter = _CountingFingerprinter(engine='fast')
+        index = FingerprintIndex.from_fingerprints(["select * from users where id = ?"], fingerprinter)
+        assert index.match(b"DELETE FROM users") is None
+        assert fingerprinter.calls == 0
+        assert index.match(memoryview(b"SELECT * FROM users WHERE id = 1")) == "select * from users where id = ?"
+
+    def test_comments_and_quoted_names(self, index):
+        assert index.match("SELECT /* hint */ * FROM `users` -- trailing\nWHERE id = 9") == \
+            "select * from users where id = ?"
+
+    def test_name_touching_word(self):
+        index = FingerprintIndex.from_queries(["SELECT a bcd FROM t"])
+        assert index.match("SELECT `a b`cd FROM t") == "select a bcd from t"
+
+    @pytest.mark.parametrize('engine', ['fast', 'sqlparse'])
+    def test_unsupported_input_is_fingerprinted(self, engine):
+        fingerprinter = _CountingFingerprinter(engine=engine)
+        index = FingerprintIndex.from_queries(["SELECT * FROM users WHERE id = @id"], fingerprinter)
+        assert index.match("SELECT * FROM users WHERE id = @id") == "select * from users where id = @id"
+        assert index.match("SELECT * FROM users WHERE name = 'é'") is None
+        assert index.match("SELECT * FROM users WHERE id = `1a`") is None
+
+    @pytest.mark.parametrize('engine', ['fast', 'sqlparse'])
+    def test_null_in_collapsed_list(self, engine):
+        index = FingerprintIndex.from_fingerprints(["select * from t where a in (?) and b is null"],
+                                                   SQLFingerprinter(engine=engine))
+        assert index.match("SELECT * FROM t WHERE a IN (NULL, 1) AND b IS NULL") == \
+            "select * from t where a in (?) and b is null"
+        assert index.match("SELECT * FROM t WHERE a IN (1, 2) AND b IS NOT NULL") is None
+
+    def test_punctuation_decides_match(self):
+        index = FingerprintIndex.from_fingerprints(["select a from t where b = ?"])
+        assert index.match("SELECT a FROM t WHERE b < 1") is None
+        assert index.match("SELECT a FROM t WHERE b = 1") == "select a from t where b = ?"
+
+    def test_select_clause_list_with_strings(self):
+        index = FingerprintIndex.from_queries(["SELECT a IN ('x', 'y') FROM t WHERE b IN ('p', 'q')"])
+        assert index.match("select a in ('x', 'y') from t where b in ('r', 's', 't')") == \
+            "select a in ('x', 'y') from t where b in (?)"
+        assert index.match("select a in ('x', 'z') from t where b in ('r', 's')") is None
+
+    def test_sqlparse_engine(self):
+        index = FingerprintIndex.from_queries(["SELECT a FROM t WHERE b = 1"], SQLFingerprinter())
+        assert index.match("select a from t where b = 'x'") == "select a from t where b = ?"
+
+    def test_degraded_prefix_rejected(self):
+        with pytest.raises(ValueError):
+            FingerprintIndex(SQLFingerprinter(max_length=10, degraded_prefix=5))
+
+    def test_fingerprint_error(self, index):
+        with pytest.raises(SQLFingerprintError):
+            index.match(123)
+
+    def test_pickle(self, index):
+        copy = pickle.loads(pickle.dumps(index))
+        assert len(copy) == len(index)
+        assert copy.match("SELECT * FROM users WHERE id = 3") == "select * from users where id = ?"
+        assert copy.match("SELECT * FROM orders WHERE id = 3") is None
+
+    def test_save_load(self, tmp_path):
+        path = str(tmp_path / 'index.pickle')
+        index = FingerprintIndex.from_queries(["SELECT a FROM t WHERE b = 1"], SQLFingerprinter(max_tokens=1000))
+        index.save(path)
+        loaded = FingerprintIndex.load(path)
+        assert loaded.fingerprinter.engine == 'sqlparse'
+        assert loaded.fingerprinter.max_tokens == 1000
+        assert loaded.get("SELECT a FROM t WHERE b = 2", 'missing') is None
+        fingerprinter = SQLFingerprinter(engine='fast')
+        assert FingerprintIndex.load(path, fingerprinter).fingerprinter is fingerprinter
+
+    def test_load_rejects_other_objects(self, tmp_path):
+        path = tmp_path / 'other.pickle'
+        path.write_bytes(pickle.dumps({'a': 1}))
+        with pytest.raises(ValueError):
+            FingerprintIndex.load(str(path))
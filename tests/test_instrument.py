@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from sqlfingerprint import FingerprintCache, Instrumentation, SQLFingerprinter, SQLFingerprintError
+
+
+class TestInstrumentation:
+    def test_sqlparse_stages(self):
+        instrumentation = Instrumentation()
+        fingerprinter = SQLFingerprinter(instrumentation=instrumentation)
+        fingerprinter.fingerprint("SELECT * FROM users WHERE id = 1")
+        fingerprinter.fingerprint("SELECT * FROM users WHERE id = 2")
+        stats = instrumentation.stats()
+        assert stats.calls == 2
+        assert stats.errors == 0
+        assert list(stats.stages) == ['cache', 'bulk', 'format', 'parse', 'render', 'postprocess']
+        assert all(stage.calls == 2 for stage in stats.stages.values())
+        assert sum(stage.seconds for stage in stats.stages.values()) == pytest.approx(stats.seconds)
+
+    def test_fast_engine_stages(self):
+        instrumentation = Instrumentation()
+        SQLFingerprinter(engine='fast', instrumentation=instrumentation).fingerprint("SELECT 1")
+        assert list(instrumentation.stats().stages) == ['cache', 'bulk', 'lexer']
+
+    def test_cache_hits_only_time_the_cache(self):
+        instrumentation = Instrumentation()
+        fingerprinter = SQLFingerprinter(cache=FingerprintCache(), instrumentation=instrumentation)
+        fingerprinter.fingerprint("SELECT 1")
+        instrumentation.clear()
+        fingerprinter.fingerprint("SELECT 1")
+        assert list(instrumentation.stats().stages) == ['cache']
+
+    def test_sampling(self):
+        instrumentation = Instrumentation(sample_every=3)
+        fingerprinter = SQLFingerprinter(instrumentation=instrumentation)
+        for i in range(9):
+            fingerprinter.fingerprint(f"SELECT {i}")
+        assert instrumentation.stats().calls == 3
+
+    def test_size_histogram(self):
+        instrumentation = Instrumentation(size_buckets=(10, 100))
+        fingerprinter = SQLFingerprinter(instrumentation=instrumentation)
+        fingerprinter.fingerprint("SELECT 1")
+        fingerprinter.fingerprint("SELECT * FROM users")
+        fingerprinter.fingerprint("SELECT " + ", ".join(["a"] * 100))
+        assert instrumentation.stats().sizes == {10: 1, 100: 1, float('inf'): 1}
+
+    def test_slowest(self):
+        instrumentation = Instrumentation(slowest=2)
+        fingerprinter = SQLFingerprinter(instrumentation=instrumentation)
+        big = "SELECT " + ", ".join(f"c{i}" for i in range(300)) + " FROM t"
+        for sql in ["SELECT 1", big, "SELECT 2", "SELECT 3"]:
+            fingerprinter.fingerprint(sql)
+        slowest = instrumentation.stats().slowest
+        assert len(slowest) == 2
+        assert slowest[0].sql == big
+        assert slowest[0].size == len(big)
+        assert slowest[0].seconds >= slowest[1].seconds
+
+    def test_errors_are_recorded(self):
+        instrumentation = Instrumentation()
+        with pytest.raises(SQLFingerprintError):
+            SQLFingerprinter(instrumentation=instrumentation).fingerprint(123)
+        assert instrumentation.stats().errors == 1
+
+    def test_hook(self):
+        samples = []
+        fingerprinter = SQLFingerprinter(instrumentation=Instrumentation(hook=samples.append))
+        fingerprinter.fingerprint("SELECT 1")
+        (sample,) = samples
+        assert sample.sql == "SELECT 1"
+        assert sample.error is None
+        assert 'parse' in sample.stages
+        assert sample.seconds >= sum(sample.stages.values()) - 1e-9
+
+    def test_threads(self):
+        instrumentation = Instrumentation()
+        fingerprinter = SQLFingerprinter(engine='fast', instrumentation=instrumentation)
+
+        def work():
+            for i in range(50):
+                fingerprinter.fingerprint(f"SELECT {i}")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert instrumentation.stats().calls == 200
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            Instrumentation(sample_every=0)
+        with pytest.raises(ValueError):
+            Instrumentation(slowest=-1)
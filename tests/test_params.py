@@ -0,0 +1,95 @@
+import pytest
+
+from sqlfingerprint import DegradedFingerprint, Parameter, ParameterizedFingerprint, SQLFingerprinter
+
+
+@pytest.fixture(params=['sqlparse', 'fast'])
+def fingerprinter(request):
+    return SQLFingerprinter(engine=request.param)
+
+
+def check_positions(sql, result):
+    for parameter in result.parameters:
+        assert sql[parameter.position:parameter.position + len(parameter.value)] == parameter.value
+
+
+class TestFingerprintParams:
+    def test_literals(self, fingerprinter):
+        sql = "SELECT 'keep', a FROM t WHERE b = 'x' AND c > 2.5 AND d = 0x1F AND e = -7 AND f = TRUE"
+        result = fingerprinter.fingerprint_params(sql)
+        assert result.fingerprint == fingerprinter.fingerprint(sql)
+        assert result.parameters == [
+            Parameter("'x'", 'string', 34),
+            Parameter('2.5', 'float', 46),
+            Parameter('0x1F', 'hex', 58),
+            Parameter('-7', 'integer', 71),
+            Parameter('TRUE', 'boolean', 82),
+        ]
+        assert not result.collapsed
+        check_positions(sql, result)
+
+    def test_in_list(self, fingerprinter):
+        sql = "SELECT * FROM t WHERE x IN (1, 2, 3) AND y = 'z'"
+        result = fingerprinter.fingerprint_params(sql)
+        assert result.fingerprint == "select * from t where x in (?) and y = ?"
+        assert [p.value for p in result.parameters] == ['1', '2', '3', "'z'"]
+        assert result.collapsed
+        check_positions(sql, result)
+
+    def test_in_list_of_expressions(self, fingerprinter):
+        sql = "SELECT * FROM t WHERE x IN (1 + 1, -2) AND y = 3"
+        result = fingerprinter.fingerprint_params(sql)
+        assert [p.value for p in result.parameters] == ['1', '1', '-2', '3']
+        check_positions(sql, result)
+
+    def test_bulk_values(self, fingerprinter):
+        sql = "INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y') /* c */"
+        result = fingerprinter.fingerprint_params(sql)
+        assert result.fingerprint == "insert into t (a, b) values (?)"
+        assert [(p.value, p.type) for p in result.parameters] == [
+            ('1', 'integer'), ("'x'", 'string'), ('2', 'integer'), ("'y'", 'string')]
+        assert result.collapsed
+        check_positions(sql, result)
+
+    def test_bulk_null_and_booleans(self, fingerprinter):
+        sql = "INSERT INTO t VALUES (NULL, TRUE, -1.5e3), (2, false, NULL)"
+        result = fingerprinter.fingerprint_params(sql)
+        assert result.fingerprint == "insert into t values (?)"
+        assert [(p.value, p.type) for p in result.parameters] == [
+            ('TRUE', 'boolean'), ('-1.5e3', 'float'), ('2', 'integer'), ('false', 'boolean')]
+        check_positions(sql, result)
+
+    def test_literals_around_bulk_list(self, fingerprinter):
+        sql = "SELECT a FROM t WHERE b = 'é' AND c IN ('p', 'q') AND d IN (4, 5, 6) AND e = 7"
+        result = fingerprinter.fingerprint_params(sql)
+        assert [p.value for p in result.parameters] == ["'é'", "'p'", "'q'", '4', '5', '6', '7']
+        check_positions(sql, result)
+
+    def test_select_strings_are_kept(self, fingerprinter):
+        sql = "SELECT x IN ('a', 'b') FROM t WHERE y = 1"
+        result = fingerprinter.fingerprint_params(sql)
+        assert result.fingerprint == "select x in ('a', 'b') from t where y = ?"
+        assert result.parameters == [Parameter('1', 'integer', 40)]
+
+    def test_placeholders_are_not_parameters(self, fingerprinter):
+        result = fingerprinter.fingerprint_params("SELECT * FROM t WHERE a IN (?, ?) AND b = %(b)s")
+        assert result.parameters == []
+        assert result.collapsed
+
+    def test_binary_input(self, fingerprinter):
+        result = fingerprinter.fingerprint_params(memoryview(b"SELECT * FROM t WHERE a = 1"))
+        assert result.parameters == [Parameter('1', 'integer', 26)]
+
+    def test_empty(self, fingerprinter):
+        assert fingerprinter.fingerprint_params("") == ParameterizedFingerprint("", [])
+
+    def test_degraded(self):
+        result = SQLFingerprinter(max_length=10).fingerprint_params("SELECT * FROM t WHERE a = 1")
+        assert isinstance(result.fingerprint, DegradedFingerprint)
+        assert result.parameters is None
+
+    def test_compact(self):
+        result = SQLFingerprinter().fingerprint_params("SELECT 1")
+        assert not hasattr(result, '__dict__')
+        with pytest.raises(AttributeError):
+            result.extra = 1
@@ -0,0 +1,80 @@
+import pytest
+import sqlparse
+from sqlparse import lexer
+
+from sqlfingerprint import FingerprintCache, Instrumentation, SQLFingerprinter, SQLFingerprintError
+
+QUERIES = [
+    "SELECT id, name FROM Users WHERE age > 18 AND active = TRUE",
+    "SELECT 'Keep' AS label, \"Quoted\" FROM t /* hint */ WHERE x = 'drop' -- trailing",
+    "select a,b from t where c in (1, 2, 3) order by 1",
+    "INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')",
+    "SELECT * FROM t WHERE a IN (SELECT b FROM u WHERE c = (SELECT max(d) FROM v))",
+    "UPDATE `Accounts` SET balance = balance - 10.5 WHERE id = 3",
+]
+
+
+def snapshot(stmt):
+    return str(stmt), [(token.ttype, token.value, token.normalized, token.parent) for token in stmt.flatten()]
+
+
+@pytest.fixture(params=['sqlparse', 'fast'])
+def fingerprinter(request):
+    return SQLFingerprinter(engine=request.param)
+
+
+class TestFingerprintParsed:
+    @pytest.mark.parametrize('sql', QUERIES)
+    def test_statement(self, fingerprinter, sql):
+        stmt = sqlparse.parse(sql)[0]
+        before = snapshot(stmt)
+        assert fingerprinter.fingerprint_parsed(stmt) == fingerprinter.fingerprint(sql)
+        assert snapshot(stmt) == before
+
+    @pytest.mark.parametrize('sql', QUERIES)
+    def test_token_streams(self, fingerprinter, sql):
+        expected = fingerprinter.fingerprint(sql)
+        assert fingerprinter.fingerprint_parsed(lexer.tokenize(sql)) == expected
+        assert fingerprinter.fingerprint_parsed(sqlparse.parse(sql)[0].flatten()) == expected
+
+    def test_first_statement_of_stream(self, fingerprinter):
+        tokens = list(lexer.tokenize("SELECT 1; DELETE FROM t"))
+        assert fingerprinter.fingerprint_parsed(tokens) == "select ?;"
+        assert fingerprinter.fingerprint_parsed(tokens) == "select ?;"
+
+    def test_statement_reused(self):
+        fingerprinter = SQLFingerprinter()
+        stmt = sqlparse.parse("SELECT a FROM t WHERE b = 'x'")[0]
+        for _ in range(3):
+            assert fingerprinter.fingerprint_parsed(stmt) == "select a from t where b = ?"
+
+    def test_does_not_lex_text(self, monkeypatch):
+        stmt = sqlparse.parse("SELECT a FROM t WHERE b = 1")[0]
+
+        def fail(*args):
+            raise AssertionError("lexed again")
+
+        monkeypatch.setattr(lexer.Lexer, 'get_tokens', fail)
+        assert SQLFingerprinter().fingerprint_parsed(stmt) == "select a from t where b = ?"
+
+    def test_shares_cache(self):
+        cache = FingerprintCache()
+        fingerprinter = SQLFingerprinter(cache=cache)
+        fingerprinter.fingerprint("SELECT 1")
+        assert fingerprinter.fingerprint_parsed(sqlparse.parse("SELECT 1")[0]) == "select ?"
+        assert cache.stats().hits == 1
+
+    def test_instrumentation_and_limits(self):
+        instrumentation = Instrumentation()
+        fingerprinter = SQLFingerprinter(instrumentation=instrumentation, max_length=20)
+        assert fingerprinter.fingerprint_parsed(sqlparse.parse("SELECT a FROM t")[0]) == "select a from t"
+        long = fingerprinter.fingerprint_parsed(sqlparse.parse("SELECT a FROM t WHERE b = 12345")[0])
+        assert long.reason == 'length'
+        assert instrumentation.stats().calls == 2
+
+    def test_empty(self, fingerprinter):
+        assert fingerprinter.fingerprint_parsed([]) == ""
+
+    def test_error(self, fingerprinter):
+        with pytest.raises(SQLFingerprintError):
+            fingerprinter.fingerprint_parsed(42)
@@ -0,0 +1,136 @@
+import multiprocessing
+
+import pytest
+
+from sqlfingerprint import DegradedFingerprint, PersistentCache, SQLFingerprinter, SQLFingerprintError
+
+
+def _fill(path, start):
+    with PersistentCache(path, memory_entries=0) as cache:
+        fingerprinter = SQLFingerprinter(cache=cache)
+        for i in range(start, start + 50):
+            fingerprinter.fingerprint(f"SELECT c{i} FROM t WHERE id = {i}")
+
+
+class TestPersistentCache:
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        with PersistentCache(path) as cache:
+            SQLFingerprinter(cache=cache).fingerprint("SELECT * FROM users WHERE id = 1")
+        with PersistentCache(path) as cache:
+            SQLFingerprinter(cache=cache)
+            assert cache.get("SELECT * FROM users WHERE id = 1") == "select * from users where id = ?"
+            assert cache.stats().hits == 1
+
+    def test_memory_front(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db')) as cache:
+            cache.put("SELECT 1", "select ?")
+            cache.clear()
+            cache.put("SELECT 1", "select ?")
+            assert cache.get("SELECT 1") == "select ?"
+            assert cache.stats().hits == 1
+
+    def test_miss(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db')) as cache:
+            assert cache.get("SELECT 1") is None
+            assert cache.stats().misses == 1
+
+    def test_version_change_invalidates(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        with PersistentCache(path, version='1') as cache:
+            cache.put("SELECT 1", "select ?")
+        with PersistentCache(path, version='2') as cache:
+            assert cache.get("SELECT 1") is None
+            cache.put("SELECT 1", "select 1")
+        with PersistentCache(path, version='1') as old, PersistentCache(path, version='2') as new:
+            assert len(old) == 2
+            assert old.get("SELECT 1") == "select ?"
+            assert new.get("SELECT 1") == "select 1"
+
+    def test_old_versions_age_out(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        with PersistentCache(path, max_entries=10, memory_entries=0, version='1') as cache:
+            for i in range(10):
+                cache.put(f"SELECT {i}", "select ?")
+        with PersistentCache(path, max_entries=10, memory_entries=0, version='2') as cache:
+            for i in range(11):
+                cache.put(f"SELECT {i}", "select ?")
+            assert len(cache) <= 10
+            assert cache.get("SELECT 10") == "select ?"
+
+    def test_keyed_by_fingerprinter_options(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        sql = "SELECT a, b, c FROM t WHERE d = 1"
+        with PersistentCache(path) as cache:
+            assert SQLFingerprinter(cache=cache, max_tokens=5).fingerprint(sql).reason == 'tokens'
+        with PersistentCache(path) as cache:
+            assert SQLFingerprinter(cache=cache).fingerprint(sql) == "select a, b, c from t where d = ?"
+            assert cache.stats().hits == 0
+        with PersistentCache(path) as cache:
+            assert SQLFingerprinter(cache=cache, max_tokens=5).fingerprint(sql).reason == 'tokens'
+            assert cache.stats().hits == 1
+
+    def test_bound_to_one_configuration(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db')) as cache:
+            SQLFingerprinter(cache=cache)
+            SQLFingerprinter(cache=cache)
+            with pytest.raises(ValueError):
+                SQLFingerprinter(cache=cache, engine='fast')
+
+    def test_default_version(self, tmp_path):
+        import sqlparse
+        with PersistentCache(str(tmp_path / 'cache.db')) as cache:
+            assert cache.version.endswith(':' + sqlparse.__version__)
+
+    def test_eviction(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db'), max_entries=100, memory_entries=0) as cache:
+            for i in range(1000):
+                cache.put(f"SELECT {i}", "select ?")
+                if i < 5:
+                    assert cache.get("SELECT 0") == "select ?"
+            stats = cache.stats()
+            assert stats.size <= 110
+            assert stats.evictions == 1000 - stats.size
+
+    def test_least_recently_used_evicted_first(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db'), max_entries=10, memory_entries=0) as cache:
+            for i in range(10):
+                cache.put(f"SELECT {i}", "select ?")
+                cache.get("SELECT 0")
+            cache.put("SELECT 10", "select ?")
+            assert cache.get("SELECT 0") == "select ?"
+            assert cache.get("SELECT 1") is None
+
+    def test_degraded_fingerprint_kept(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        with PersistentCache(path) as cache:
+            cache.put("SELECT 1", DegradedFingerprint("select ?", 'tokens'))
+        with PersistentCache(path) as cache:
+            result = cache.get("SELECT 1")
+            assert isinstance(result, DegradedFingerprint)
+            assert result.reason == 'tokens'
+
+    def test_non_str_input(self, tmp_path):
+        with PersistentCache(str(tmp_path / 'cache.db')) as cache:
+            with pytest.raises(SQLFingerprintError):
+                SQLFingerprinter(cache=cache).fingerprint(42)
+
+    def test_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        PersistentCache(path).close()
+        processes = [multiprocessing.Process(target=_fill, args=(path, start)) for start in (0, 25, 50, 75)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+        with PersistentCache(path) as cache:
+            SQLFingerprinter(cache=cache)
+            assert len(cache) == 125
+            assert cache.get("SELECT c99 FROM t WHERE id = 99") == "select c99 from t where id = ?"
+
+    def test_invalid_arguments(self, tmp_path):
+        with pytest.raises(ValueError):
+            PersistentCache(str(tmp_path / 'cache.db'), max_entries=0)
+        with pytest.raises(ValueError):
+            PersistentCache(str(tmp_path / 'cache.db'), memory_entries=-1)
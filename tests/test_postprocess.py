@@ -0,0 +1,42 @@
+import random
+import re
+
+import pytest
+
+from sqlfingerprint.postprocess import postprocess
+
+
+def legacy_postprocess(sql):
+    """The chain of re.sub passes postprocess replaces."""
+    sql = re.sub(r'in\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', 'in (?)', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\(\s+', '( ', sql)
+    sql = re.sub(r'\s+\)', ' )', sql)
+    for keyword in ['like', 'in', 'and', 'or', 'not', 'exists', 'is null']:
+        sql = re.sub(rf'\b{keyword}\b', keyword, sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\s+', ' ', sql)
+    sql = re.sub(r'`([^`]+)`', r'\1', sql)
+    return sql.strip()
+
+
+CASES = [
+    "select * from t where a IN (?, ?,\n ?) AND b Like ?",
+    "select 'IS  NULL', 'x IS NULL' from t where c IS NULL",
+    "select `a  b`, `IN (?,?)`, `` `x` from t",
+    "select * from t where x NOT EXISTS ( select 1 )",
+    "  join (?, ?) andin (?,?) Or\t\tNot  ",
+    "select `is\nnull` from `t`",
+]
+
+
+class TestPostprocess:
+    @pytest.mark.parametrize('sql', CASES)
+    def test_matches_legacy(self, sql):
+        assert postprocess(sql) == legacy_postprocess(sql)
+
+    def test_matches_legacy_random(self):
+        rng = random.Random(0)
+        pieces = ['in', 'IN', 'Like', 'is', 'null', 'is null', 'and', 'x', '(', ')', '?', ',', '`',
+                  ' ', '  ', '\n', '\t', 'exists', 'not', 'or', 'orin']
+        for _ in range(5000):
+            sql = ''.join(rng.choice(pieces) for _ in range(rng.randrange(1, 20)))
+            assert postprocess(sql) == legacy_postprocess(sql), sql
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from sqlfingerprint import FingerprintCache, SQLFingerprinter, SQLFingerprintError
+from sqlfingerprint.core import shape_key
+
+LITERALS = ['1', '-3', '+4', '1.5', '1.', '.5', '1e3', '1E-3', '1e+3', '0x1F', 'NULL', 'TRUE',
+            "'a'", "'it''s'", "'a\\'b'", "''", '?', '$1', '1\\2', '3\\4']
+NAMES = ['a', 'b1', 't#1', 't#2', 't.c2', '[col 1]', '[col 2]', '"q 1"', '`b 2`', '"it\'s"']
+GAPS = [' ', '  ', '\n', ' /* 1 */ ', ' -- c 1\n', " # it's 1\n"]
+
+
+def random_query(rng):
+    def lit():
+        return rng.choice(LITERALS)
+
+    def name():
+        return rng.choice(NAMES)
+
+    condition = rng.choice([
+        lambda: f'{name()} = {lit()}',
+        lambda: f'{name()} IN ({", ".join(lit() for _ in range(rng.randrange(1, 4)))})',
+        lambda: f'{name()} - {lit()} > {name()}',
+    ])()
+    return rng.choice([
+        lambda: f'SELECT {name()}, {lit()}{rng.choice(GAPS)}FROM {name()} WHERE {condition}',
+        lambda: 'INSERT INTO t (a, b) VALUES%s%s' % (rng.choice(GAPS), ', '.join(
+            f'({lit()}, {lit()})' for _ in range(rng.randrange(1, 4)))),
+        lambda: f'UPDATE {name()} SET {name()} = {lit()}{rng.choice(GAPS)}WHERE {condition}',
+    ])()
+
+
+class TestShapeKey:
+    def test_masks_literals_and_whitespace(self):
+        assert shape_key("SELECT *  FROM t\n WHERE id = 123 AND name = 'it''s'") == \
+            "SELECT * FROM t\nWHERE id = ? AND name = '?'"
+
+    def test_keeps_identifiers_and_comments(self):
+        sql = 'SELECT "it\'s", t1.c2 FROM t -- don\'t\nWHERE x = $1'
+        assert shape_key(sql) == 'SELECT "it\'s", t1.c2 FROM t -- don\'t\nWHERE x = $1'
+
+    def test_keeps_bracket_names_and_hash_comments(self):
+        assert shape_key("SELECT [col 1] FROM t # it's 2\nWHERE a = 3") == \
+            "SELECT [col 1] FROM t # it's 2\nWHERE a = ?"
+
+    def test_digits_inside_operands_kept(self):
+        assert shape_key("SELECT a FROM t#1") != shape_key("SELECT a FROM t#2")
+        assert shape_key("SELECT a FROM t WHERE b = 1\\2") != shape_key("SELECT a FROM t WHERE b = 3\\4")
+
+    def test_non_text(self):
+        with pytest.raises(SQLFingerprintError):
+            shape_key(42)
+
+    def test_same_shape(self):
+        assert shape_key("SELECT * FROM t WHERE id = 1") == shape_key("SELECT * FROM t WHERE id =   42")
+
+
+class TestShapeCache:
+    def setup_method(self):
+        self.shape_cache = FingerprintCache()
+        self.fingerprinter = SQLFingerprinter(shape_cache=self.shape_cache)
+
+    def test_literal_variants_resolved_by_shape(self):
+        for i in range(10):
+            sql = f"SELECT * FROM users WHERE id = {i} AND name = 'user{i}'"
+            assert self.fingerprinter.fingerprint(sql) == "select * from users where id = ? and name = ?"
+        stats = self.shape_cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (9, 1, 1)
+
+    def test_select_clause_strings_not_shared(self):
+        assert self.fingerprinter.fingerprint("SELECT 'a' FROM t") == "select 'a' from t"
+        assert self.fingerprinter.fingerprint("SELECT 'b' FROM t") == "select 'b' from t"
+        assert self.shape_cache.stats().size == 0
+
+    def test_with_raw_cache(self):
+        cache = FingerprintCache()
+        fingerprinter = SQLFingerprinter(cache=cache, shape_cache=self.shape_cache)
+        fingerprinter.fingerprint("SELECT * FROM t WHERE id = 1")
+        fingerprinter.fingerprint("SELECT * FROM t WHERE id = 2")
+        fingerprinter.fingerprint("SELECT * FROM t WHERE id = 2")
+        assert cache.stats().hits == 1
+        assert self.shape_cache.stats().hits == 1
+
+    def test_bracket_names_not_shared(self):
+        assert self.fingerprinter.fingerprint("SELECT [col 1] FROM t") == "select [col 1] from t"
+        assert self.fingerprinter.fingerprint("SELECT [col 2] FROM t") == "select [col 2] from t"
+
+    def test_hash_names_not_shared(self):
+        assert self.fingerprinter.fingerprint("SELECT a FROM t#1") == "select a from t#1"
+        assert self.fingerprinter.fingerprint("SELECT a FROM t#2") == "select a from t#2"
+
+    def test_non_text_is_a_fingerprint_error(self):
+        with pytest.raises(SQLFingerprintError):
+            self.fingerprinter.fingerprint(42)
+        results = list(self.fingerprinter.fingerprint_many(["SELECT 1", 42]))
+        assert results[0] == "select ?"
+        assert isinstance(results[1], SQLFingerprintError)
+
+    def test_values_spellings(self):
+        assert self.fingerprinter.fingerprint("INSERT INTO t VALUES (1), (2)") == "insert into t values (?)"
+        assert self.fingerprinter.fingerprint("INSERT INTO t VALUES (1e3), (2)") == "insert into t values (?)"
+
+    @pytest.mark.parametrize('engine', ['sqlparse', 'fast'])
+    def test_agrees_with_uncached_under_token_limit(self, engine):
+        rng = random.Random(20261017)
+        for max_tokens in range(10, 40, 3):
+            cached = SQLFingerprinter(engine=engine, shape_cache=FingerprintCache(), max_tokens=max_tokens)
+            plain = SQLFingerprinter(engine=engine, max_tokens=max_tokens)
+            for _ in range(100):
+                sql = random_query(rng)
+                result, expected = cached.fingerprint(sql), plain.fingerprint(sql)
+                assert (result, getattr(result, 'reason', None)) == (expected, getattr(expected, 'reason', None)), sql
+
+    @pytest.mark.parametrize('engine', ['sqlparse', 'fast'])
+    def test_agrees_with_uncached(self, engine):
+        rng = random.Random(20261016)
+        cached = SQLFingerprinter(engine=engine, shape_cache=FingerprintCache())
+        plain = SQLFingerprinter(engine=engine)
+        for _ in range(800):
+            sql = random_query(rng)
+            assert cached.fingerprint(sql) == plain.fingerprint(sql), sql
@@ -0,0 +1,107 @@
+import io
+import random
+
+import pytest
+
+from sqlfingerprint import SQLFingerprinter, SQLFingerprintError
+from sqlfingerprint.core import split_statements
+from sqlfingerprint.stream import iter_statements
+
+SCRIPT = """
+CREATE INDEX idx ON t (a);
+-- a comment; not a statement
+INSERT INTO t (a, b) VALUES (1, 'x;y');
+UPDATE t SET b = 'it''s; fine' WHERE a = 2;
+/* block; comment */
+SELECT `col;name` FROM t WHERE c = "q;" AND d = 'a\\';';
+"""
+
+
+class TestSplitStatements:
+    def test_split(self):
+        statements = list(split_statements(SCRIPT))
+        assert len(statements) == 4
+        for offset, statement in statements:
+            assert SCRIPT[offset:offset + len(statement)] == statement
+        assert statements[1][1].endswith("VALUES (1, 'x;y')")
+        assert statements[2][1] == "UPDATE t SET b = 'it''s; fine' WHERE a = 2"
+        assert statements[3][1].endswith("""AND d = 'a\\';'""")
+
+    def test_unterminated_string(self):
+        assert [s for _, s in split_statements("SELECT 1; SELECT 'a;b")] == ["SELECT 1", "SELECT 'a;b"]
+
+    def test_hash_comment(self):
+        sql = "SELECT 1 # not; a statement\nFROM t; SELECT #t.a FROM #t; SELECT 2"
+        assert [s for _, s in split_statements(sql)] == [
+            "SELECT 1 # not; a statement\nFROM t", "SELECT #t.a FROM #t", "SELECT 2"]
+
+    def test_dollar_quotes(self):
+        sql = ("CREATE FUNCTION f() RETURNS int AS $$ BEGIN RETURN 1; END; $$ LANGUAGE plpgsql; "
+               "CREATE FUNCTION g() RETURNS text AS $body$ SELECT 'a;b'; $body$ LANGUAGE sql; SELECT 1")
+        assert [s for _, s in split_statements(sql)] == [
+            "CREATE FUNCTION f() RETURNS int AS $$ BEGIN RETURN 1; END; $$ LANGUAGE plpgsql",
+            "CREATE FUNCTION g() RETURNS text AS $body$ SELECT 'a;b'; $body$ LANGUAGE sql", "SELECT 1"]
+
+    def test_dollars_in_names_and_parameters(self):
+        sql = "SELECT a$b$c FROM t; SELECT $1; SELECT $2"
+        assert [s for _, s in split_statements(sql)] == ["SELECT a$b$c FROM t", "SELECT $1", "SELECT $2"]
+
+    def test_blocks(self):
+        sql = ("CREATE PROCEDURE p() BEGIN SELECT CASE WHEN a THEN 1 END; UPDATE t SET b = 2; END; "
+               "CREATE TRIGGER tr BEFORE INSERT ON t FOR EACH ROW BEGIN IF NEW.a THEN SET NEW.b = 1; END IF; END; "
+               "SELECT CASE WHEN a THEN 1 END, t.end, beginning FROM t; CALL p()")
+        assert [s for _, s in split_statements(sql)] == [
+            "CREATE PROCEDURE p() BEGIN SELECT CASE WHEN a THEN 1 END; UPDATE t SET b = 2; END",
+            "CREATE TRIGGER tr BEFORE INSERT ON t FOR EACH ROW BEGIN IF NEW.a THEN SET NEW.b = 1; END IF; END",
+            "SELECT CASE WHEN a THEN 1 END, t.end, beginning FROM t", "CALL p()"]
+
+    def test_transactions(self):
+        sql = "BEGIN; INSERT INTO t VALUES (1); COMMIT; BEGIN TRANSACTION; DELETE FROM t; END"
+        assert [s for _, s in split_statements(sql)] == [
+            "BEGIN", "INSERT INTO t VALUES (1)", "COMMIT", "BEGIN TRANSACTION", "DELETE FROM t", "END"]
+
+    def test_declare_section_split(self):
+        # A known gap: only BEGIN opens a block, so the semicolons of an
+        # Oracle or T-SQL DECLARE section before it end statements.
+        sql = "DECLARE x int; BEGIN x := 1; END; SELECT 1"
+        assert [s for _, s in split_statements(sql)] == ["DECLARE x int", "BEGIN x := 1; END", "SELECT 1"]
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 5, 64])
+    def test_agrees_with_stream(self, chunk_size):
+        pieces = ["SELECT", " ", "\n", ";", "'a;b'", "'it''s;'", "'a\\';'", '"q;"', '`c;`', "-- x;\n", "# y;\n",
+                  "#t", "/* z; */", "/*", "'", "-", "/", "*", "\\", "$$", "$a$", "$", "a", "\u00e9", "BEGIN", "END",
+                  "END IF", "CASE", "TRANSACTION"]
+        rng = random.Random(20261017)
+        for _ in range(600):
+            sql = ''.join(rng.choice(pieces) for _ in range(rng.randrange(1, 30)))
+            assert [(len(sql[:offset].encode()), statement.encode()) for offset, statement in split_statements(sql)] \
+                == list(iter_statements(io.BytesIO(sql.encode()), chunk_size)), sql
+
+
+@pytest.mark.parametrize('engine', ['sqlparse', 'fast'])
+class TestFingerprintStatements:
+    def test_script(self, engine):
+        fingerprinter = SQLFingerprinter(engine=engine)
+        results = list(fingerprinter.fingerprint_statements(SCRIPT))
+        assert [fingerprint for _, fingerprint in results[1:]] == [
+            "insert into t (a, b) values (?, ?)",
+            "update t set b = ? where a = ?",
+            "select col;name from t where c = ? and d = ?",
+        ]
+        assert SCRIPT[results[2][0]:].startswith("UPDATE")
+
+    def test_matches_fingerprint(self, engine):
+        fingerprinter = SQLFingerprinter(engine=engine)
+        results = list(fingerprinter.fingerprint_statements("SELECT 1; DELETE FROM t WHERE id = 5"))
+        assert results == [(0, "select ?"), (10, "delete from t where id = ?")]
+
+    def test_function_body(self, engine):
+        sql = "CREATE FUNCTION f() RETURNS int AS $$ BEGIN RETURN 1; END; $$ LANGUAGE plpgsql; SELECT 1"
+        fingerprinter = SQLFingerprinter(engine=engine)
+        results = list(fingerprinter.fingerprint_statements(sql))
+        assert [offset for offset, _ in results] == [0, sql.index("SELECT 1")]
+        assert results[0][1] == fingerprinter.fingerprint(sql[:sql.index("; SELECT 1")])
+
+    def test_error(self, engine):
+        with pytest.raises(SQLFingerprintError):
+            list(SQLFingerprinter(engine=engine).fingerprint_statements(42))
@@ -0,0 +1,85 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from sqlfingerprint.cli import main
+from sqlfingerprint.stream import StatementSplitter, fingerprint_stream, iter_statements, open_source
+
+SCRIPT = (b"SELECT * FROM t WHERE a = 'x;y' AND b = 'it''s;' AND c = 'a\\';';\n"
+          b"-- comment; with semicolon\n"
+          b"INSERT INTO `t;` VALUES (1, \"q;\");  /* block ; comment */\n"
+          b"  UPDATE t SET a = 1\n")
+
+
+class TestStatementSplitter:
+    def test_split(self):
+        statements = list(iter_statements(io.BytesIO(SCRIPT)))
+        assert [offset for offset, _ in statements] == [0, 65, 128]
+        assert statements[0][1] == b"SELECT * FROM t WHERE a = 'x;y' AND b = 'it''s;' AND c = 'a\\';'"
+        assert statements[1][1].endswith(b'INSERT INTO `t;` VALUES (1, "q;")')
+        assert statements[2][1] == b"/* block ; comment */\n  UPDATE t SET a = 1\n"
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 3, 7])
+    def test_chunk_boundaries(self, chunk_size):
+        assert list(iter_statements(io.BytesIO(SCRIPT), chunk_size)) == list(iter_statements(io.BytesIO(SCRIPT)))
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 1024])
+    def test_hash_comment(self, chunk_size):
+        script = b"SELECT 1 # not; a statement\n; SELECT 2"
+        assert list(iter_statements(io.BytesIO(script), chunk_size)) == [
+            (0, b"SELECT 1 # not; a statement\n"), (30, b"SELECT 2")]
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 1024])
+    def test_blocks(self, chunk_size):
+        script = (b"CREATE FUNCTION f() AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;\n"
+                  b"CREATE PROCEDURE p() BEGIN SELECT 1; END;\nBEGIN; SELECT 2")
+        assert [statement for _, statement in iter_statements(io.BytesIO(script), chunk_size)] == [
+            b"CREATE FUNCTION f() AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql",
+            b"CREATE PROCEDURE p() BEGIN SELECT 1; END", b"BEGIN", b"SELECT 2"]
+
+    def test_bounded_buffer(self):
+        splitter = StatementSplitter()
+        for _ in range(1000):
+            splitter.feed(b"SELECT 1; ")
+        assert len(splitter._buf) < 20
+
+
+class TestFingerprintStream:
+    def test_rows(self):
+        rows = list(fingerprint_stream(io.BytesIO(SCRIPT)))
+        assert [row.fingerprint for row in rows] == [
+            "select * from t where a = ? and b = ? and c = ?",
+            "insert into t; values (?, ?)",
+            "update t set a = ?",
+        ]
+        assert rows[0].digest == "eee87053362e4122"
+
+    def test_gzip_and_mmap(self, tmp_path):
+        plain = tmp_path / 'log.sql'
+        plain.write_bytes(SCRIPT)
+        packed = tmp_path / 'log.sql.gz'
+        packed.write_bytes(gzip.compress(SCRIPT))
+        expected = list(fingerprint_stream(io.BytesIO(SCRIPT)))
+        with open_source(str(packed)) as source:
+            assert list(fingerprint_stream(source)) == expected
+        with open_source(str(plain), use_mmap=True) as source:
+            assert list(fingerprint_stream(source)) == expected
+
+
+class TestCLI:
+    def test_jsonl(self, tmp_path):
+        source = tmp_path / 'log.sql'
+        source.write_bytes(SCRIPT)
+        output = tmp_path / 'out.jsonl'
+        assert main([str(source), '-o', str(output), '--engine', 'fast']) == 0
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert rows[2] == {'fingerprint': 'update t set a = ?', 'offset': 128,
+                           'digest': rows[2]['digest']}
+
+    def test_tsv(self, tmp_path, capsys):
+        source = tmp_path / 'log.sql'
+        source.write_bytes(b"SELECT 1")
+        assert main([str(source), '-f', 'tsv']) == 0
+        assert capsys.readouterr().out == "select ?\t0\tcd8786a6c8d278e8\n"